@@ -0,0 +1,49 @@
+"""
+Memory per pixel of the linked (SparseMatrix) and compact (CompactSparseMatrix) engines.
+
+Run from the backend directory:
+    python -m benchmarks.matrix_memory [side ...]
+"""
+
+import random
+import sys
+import tracemalloc
+
+from models.pixel import Pixel
+from models.sparse_matrix import SparseMatrix
+from models.compact_sparse_matrix import CompactSparseMatrix
+
+ENGINES = {"linked": SparseMatrix, "compact": CompactSparseMatrix}
+PALETTE = [f"#{random.randint(0, 0xFFFFFF):06x}" for _ in range(32)]
+
+
+def make_pixels(side):
+    """Builds a full side x side figure using a small pixel-art palette."""
+    return [
+        Pixel(row=row, column=col, color=random.choice(PALETTE))
+        for row in range(side)
+        for col in range(side)
+    ]
+
+
+def measure(engine, pixels):
+    """Returns the bytes still allocated by the built matrix."""
+    tracemalloc.start()
+    matrix = engine.from_pixels(pixels)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del matrix
+    return current
+
+
+def main(sides):
+    print(f"{'pixels':>10} {'engine':>8} {'bytes':>12} {'bytes/pixel':>12}")
+    for side in sides:
+        pixels = make_pixels(side)
+        for name, engine in ENGINES.items():
+            used = measure(engine, pixels)
+            print(f"{len(pixels):>10} {name:>8} {used:>12} {used / len(pixels):>12.1f}")
+
+
+if __name__ == "__main__":
+    main([int(side) for side in sys.argv[1:]] or [50, 200, 500])
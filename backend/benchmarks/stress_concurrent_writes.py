@@ -0,0 +1,104 @@
+"""
+Concurrency stress test of ImageService writes: many processes, each with its
+own ImageService (like gunicorn workers), add images to the same database at
+once; afterwards every image and render must be stored exactly once, and the
+image statistics must count every image.
+
+Run from the backend directory:
+    python -m benchmarks.stress_concurrent_writes [--store xml|log|sqlite]
+        [--workers N] [--images N]
+
+Renders use the direct SVG renderer, so Graphviz is not needed. Exits with
+status 1 if any write was lost.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from models.image import Image
+from models.pixel import Pixel
+
+
+def make_image(user_id):
+    """Builds a small random figure."""
+    return Image(
+        id=None,
+        user_id=user_id,
+        name=f"stress-{random.randint(0, 1 << 30)}",
+        pixels=[
+            Pixel(row=row, column=col, color=f"#{random.randint(0, 0xFFFFFF):06x}")
+            for row in range(8)
+            for col in range(8)
+        ],
+    )
+
+
+def worker(directory, worker_id, images, start):
+    """Adds `images` images from a fresh ImageService; returns their IDs."""
+    os.chdir(directory)
+    from services.image_service import ImageService
+
+    service = ImageService()
+    user_id = f"IPC-{worker_id:03d}"
+    while time.time() < start:  # Line all workers up before writing
+        time.sleep(0.001)
+    return [service.add_image(make_image(user_id))["image_id"] for _ in range(images)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", choices=("xml", "log", "sqlite"), default="xml")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--images", type=int, default=25, help="Images per worker")
+    args = parser.parse_args(argv)
+
+    # Read by config when the workers (and the check below) import the services
+    os.environ["IPCART_IMAGE_STORE"] = args.store
+    os.environ["IPCART_RENDERER"] = "svg"
+
+    directory = tempfile.mkdtemp(prefix="ipcart-stress-")
+    context = multiprocessing.get_context("spawn")
+    start = time.time() + 2
+    with context.Pool(args.workers) as pool:
+        results = pool.starmap(
+            worker,
+            [(directory, n, args.images, start) for n in range(args.workers)],
+        )
+    elapsed = time.time() - start
+
+    os.chdir(directory)
+    from services.image_service import ImageService
+
+    service = ImageService()
+    returned = [image_id for ids in results for image_id in ids]
+    stored = service.store.get_image_ids()
+    rendered = [entry["id"] for entry in service.get_all_gallery_metadata()]
+    counted = service.get_statistics()["total_images"]
+    expected = args.workers * args.images
+
+    print(f"store={args.store} workers={args.workers} images/worker={args.images}")
+    print(f"database:        {directory}")
+    print(f"elapsed:         {elapsed:.2f}s")
+    print(f"expected:        {expected}")
+    print(f"distinct IDs:    {len(set(returned))}")
+    print(f"stored designs:  {len(stored)} ({len(set(stored))} distinct)")
+    print(f"stored renders:  {len(rendered)} ({len(set(rendered))} distinct)")
+    print(f"counted images:  {counted}")
+
+    ok = (
+        len(set(returned)) == expected
+        and sorted(stored) == sorted(returned)
+        and sorted(set(rendered)) == sorted(returned)
+        and counted == expected
+    )
+    print("OK: no lost writes" if ok else "FAILED: writes were lost or duplicated")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import os
+
+# Storage engine of image designs and renders:
+# "xml" (imagenes.xml / imagenes_base64.xml, rewritten on every write)
+# "log" (append-only segment logs under database/imagenes_log, compacted to XML
+#        when a segment fills up or with `python -m storage.migrate --compact-log`)
+# or "sqlite" (database/ipcart.sqlite3)
+IMAGE_STORE = os.environ.get("IPCART_IMAGE_STORE", "xml")
+
+# Storage engine of users: "xml" (usuarios.xml) or "sqlite" (database/ipcart.sqlite3)
+USER_STORE = os.environ.get("IPCART_USER_STORE", "xml")
+
+# Sparse matrix engine used by ImageService to build and render designs:
+# "linked" (SparseMatrix, orthogonal linked lists) or "compact" (CompactSparseMatrix, CSR/CSC arrays)
+MATRIX_ENGINE = os.environ.get("IPCART_MATRIX_ENGINE", "linked")
+
+# Renderer used for gallery and preview images:
+# "graphviz" (plot(), full sparse matrix diagram) or "svg" (plot_svg(), direct pixel grid)
+RENDERER = os.environ.get("IPCART_RENDERER", "graphviz")
+
+# Maximum size of the on-disk render cache (database/render_cache) before LRU eviction
+RENDER_CACHE_MAX_BYTES = int(
+    os.environ.get("IPCART_RENDER_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+)
+
+# Number of background workers rendering uploaded and transformed images
+RENDER_QUEUE_WORKERS = int(os.environ.get("IPCART_RENDER_QUEUE_WORKERS", 2))
+
+# Graphviz render executor: concurrent `dot` processes (0 = number of cores),
+# seconds before a render is killed, and renders allowed to wait for a free slot
+RENDER_POOL_SIZE = int(os.environ.get("IPCART_RENDER_POOL_SIZE", 0))
+RENDER_TIMEOUT = float(os.environ.get("IPCART_RENDER_TIMEOUT", 60))
+RENDER_MAX_QUEUE = int(os.environ.get("IPCART_RENDER_MAX_QUEUE", 32))
+
+# Maximum page size of GET /image/gallery
+GALLERY_MAX_LIMIT = int(os.environ.get("IPCART_GALLERY_MAX_LIMIT", 100))
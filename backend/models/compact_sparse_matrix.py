@@ -0,0 +1,355 @@
+import base64
+from array import array
+from bisect import bisect_left
+from graphviz import Digraph
+from utils.render_executor import render_dot
+from utils.svg_renderer import render_svg
+
+
+class CompactSparseMatrix:
+    """
+    Array-backed sparse matrix with the same iteration and plot API as SparseMatrix.
+
+    Cells are stored in CSR form (row ids, row pointers, column per cell and a
+    palette index per cell) plus a CSC permutation for column-wise traversal,
+    so each pixel costs a few machine integers instead of a CellNode object.
+
+    Attributes:
+        row_ids (array): Ascending ids of the non-empty rows.
+        row_ptr (array): Offsets into the cell arrays where each row starts.
+        cols (array): Column of every cell, in (row, column) order.
+        colors (array): Palette index of every cell, in (row, column) order.
+        column_ids (array): Ascending ids of the non-empty columns.
+        column_ptr (array): Offsets into column_cells where each column starts.
+        column_cells (array): Position of every cell in the CSR arrays, in (column, row) order.
+        palette (list): Distinct cell values, indexed by colors.
+    """
+
+    def __init__(self):
+        self.row_ids = array("i")
+        self.row_ptr = array("I", [0])
+        self.cols = array("i")
+        self.colors = array("I")
+        self.column_ids = array("i")
+        self.column_ptr = array("I", [0])
+        self.column_cells = array("I")
+        self.palette = []
+
+    @classmethod
+    def from_pixels(cls, pixels):
+        """
+        Builds a compact matrix from a list of pixels.
+
+        Duplicate coordinates keep the first pixel, the same as SparseMatrix.insert().
+
+        Args:
+            pixels (list[Pixel]): Pixels to place in the matrix.
+
+        Returns:
+            CompactSparseMatrix: The populated matrix.
+        """
+        matrix = cls()
+        palette_index = {}
+
+        # 1. CSR: sort by (row, column, arrival) so the first duplicate wins
+        order = sorted(
+            range(len(pixels)), key=lambda i: (pixels[i].row, pixels[i].column, i)
+        )
+        rows = array("i")
+        previous = None
+        for i in order:
+            pixel = pixels[i]
+            if previous != None and previous == (pixel.row, pixel.column):
+                continue
+            previous = (pixel.row, pixel.column)
+
+            if not matrix.row_ids or matrix.row_ids[-1] != pixel.row:
+                if matrix.row_ids:
+                    matrix.row_ptr.append(len(matrix.cols))
+                matrix.row_ids.append(pixel.row)
+
+            color = palette_index.get(pixel.color)
+            if color == None:
+                color = palette_index[pixel.color] = len(matrix.palette)
+                matrix.palette.append(pixel.color)
+
+            rows.append(pixel.row)
+            matrix.cols.append(pixel.column)
+            matrix.colors.append(color)
+        if matrix.row_ids:
+            matrix.row_ptr.append(len(matrix.cols))
+
+        # 2. CSC: permutation of the CSR cells sorted by (column, row)
+        cols = matrix.cols
+        for position in sorted(range(len(cols)), key=lambda k: (cols[k], rows[k])):
+            if not matrix.column_ids or matrix.column_ids[-1] != cols[position]:
+                if matrix.column_ids:
+                    matrix.column_ptr.append(len(matrix.column_cells))
+                matrix.column_ids.append(cols[position])
+            matrix.column_cells.append(position)
+        if matrix.column_ids:
+            matrix.column_ptr.append(len(matrix.column_cells))
+
+        return matrix
+
+    def __len__(self):
+        return len(self.cols)
+
+    def __iter__(self):
+        """
+        Iterates over the cells in row-major order.
+
+        Yields:
+            tuple: (row, column, value) for every cell in the matrix.
+        """
+        for r, row in enumerate(self.row_ids):
+            for k in range(self.row_ptr[r], self.row_ptr[r + 1]):
+                yield row, self.cols[k], self.palette[self.colors[k]]
+
+    def get(self, x, y):
+        """
+        Returns the value stored at (x, y), or None if the cell is empty.
+
+        Uses binary search over the row ids and the row's columns, O(log n).
+        """
+        r = bisect_left(self.row_ids, x)
+        if r == len(self.row_ids) or self.row_ids[r] != x:
+            return None
+        start, end = self.row_ptr[r], self.row_ptr[r + 1]
+        k = bisect_left(self.cols, y, start, end)
+        if k == end or self.cols[k] != y:
+            return None
+        return self.palette[self.colors[k]]
+
+    def _row_cells(self, r):
+        """Returns (column, value) pairs of the r-th non-empty row."""
+        return [
+            (self.cols[k], self.palette[self.colors[k]])
+            for k in range(self.row_ptr[r], self.row_ptr[r + 1])
+        ]
+
+    def _row_of_cell(self):
+        """Expands the row pointers into the row id of every CSR cell."""
+        row_of = array("i")
+        for r, row in enumerate(self.row_ids):
+            row_of.extend([row] * (self.row_ptr[r + 1] - self.row_ptr[r]))
+        return row_of
+
+    def _column_chunks(self):
+        """Yields (column id, [row ids]) for every non-empty column, left to right."""
+        row_of = self._row_of_cell()
+        for c, column in enumerate(self.column_ids):
+            yield column, [
+                row_of[self.column_cells[k]]
+                for k in range(self.column_ptr[c], self.column_ptr[c + 1])
+            ]
+
+    def plot(self):
+        """Same DOT output as SparseMatrix.plot(), generated from the arrays."""
+        dot_parts = [
+            """digraph G {
+    graph [pad=\"0.5\", nodesep=\"1\", ranksep=\"1\"];
+    label=\"Sparse Matrix\"
+    node [shape=box, height=0.8];\n"""
+        ]
+
+        # 1. PLOT FROM ROWS
+        row_ids = []
+        row_connections = []
+        inner_nodes = []
+        inner_directions = []
+        for r, row in enumerate(self.row_ids):
+            row_ids.append(
+                f'\tRow{row}[style="filled" label = "{row}" fillcolor="white" group = 0];\n'
+            )
+            if r + 1 < len(self.row_ids):
+                row_connections.append(f"\tRow{row} -> Row{self.row_ids[r + 1]};\n")
+            inner_directions.append(f"\t{{ rank = same; Row{row}; ")
+            cells = self._row_cells(r)
+            for j, (col, value) in enumerate(cells):
+                node_id = f"NodeR{row}_C{col}"
+                inner_nodes.append(
+                    f'\t{node_id}[style="filled" label = "{value}" fillcolor="{value}" fontcolor="{value}" group = {col}];\n'
+                )
+                inner_directions.append(f"{node_id}; ")
+                if j == 0:
+                    inner_nodes.append(f'\tRow{row} -> {node_id}[dir=""];\n')
+                if j + 1 < len(cells):
+                    inner_nodes.append(f"\t{node_id} -> NodeR{row}_C{cells[j + 1][0]};\n")
+            inner_directions.append("}\n")
+
+        dot_parts += row_ids
+        dot_parts.append("""
+    edge[dir="both"];
+    """)
+        dot_parts += row_connections
+        dot_parts.append("""
+    edge[dir="both"]
+    """)
+
+        # 2. PLOT COLUMNS
+        column_ids = []
+        column_connections = []
+        column_ranks = ["\t{rank = same; "]
+        for c, (column, rows) in enumerate(self._column_chunks()):
+            column_ids.append(
+                f'\tColumn{column}[style="filled" label = "{column}" fillcolor="white" group = {column}];\n'
+            )
+            column_ranks.append(f"Column{column}; ")
+            if c + 1 < len(self.column_ids):
+                column_connections.append(
+                    f"Column{column} -> Column{self.column_ids[c + 1]};\n"
+                )
+            for i, row in enumerate(rows):
+                node_id = f"NodeR{row}_C{column}"
+                if i == 0:
+                    dot_parts.append(f'Column{column} -> {node_id}[dir=""];\n')
+                if i + 1 < len(rows):
+                    dot_parts.append(f"{node_id} -> NodeR{rows[i + 1]}_C{column};\n")
+
+        dot_parts += column_ids
+        dot_parts += column_connections
+        dot_parts.append("\n")
+        dot_parts += column_ranks
+        dot_parts.append("}\n")
+        dot_parts += inner_nodes
+        dot_parts += inner_directions
+        dot_parts.append("\n}")
+
+        image_data = render_dot("".join(dot_parts))
+
+        image_base64 = base64.b64encode(image_data).decode("utf-8")
+
+        return image_base64
+
+    def plot_pixel_art(self):
+        """Same graph as SparseMatrix.plot_pixel_art(), generated from the arrays."""
+        dot = Digraph(comment="Sparse Matrix", format="svg")
+        dot.attr(rankdir="LR", nodesep="0.5", ranksep="1.0")
+        dot.attr("node", shape="box", height="0.8")
+
+        # Add row headers
+        for r, row in enumerate(self.row_ids):
+            dot.node(f"Row{row}", label=str(row), group="0")
+            if r + 1 < len(self.row_ids):
+                dot.edge(f"Row{row}", f"Row{self.row_ids[r + 1]}")
+
+        # Add column headers
+        below = {}
+        for c, (column, rows) in enumerate(self._column_chunks()):
+            dot.node(f"Column{column}", label=str(column), group=str(column))
+            if c + 1 < len(self.column_ids):
+                dot.edge(f"Column{column}", f"Column{self.column_ids[c + 1]}")
+            for i in range(len(rows) - 1):
+                below[(rows[i], column)] = rows[i + 1]
+
+        # Add internal nodes and connections
+        for r, row in enumerate(self.row_ids):
+            cells = self._row_cells(r)
+            for j, (col, value) in enumerate(cells):
+                dot.node(f"NodeR{row}_C{col}", label=str(value))
+                if j + 1 < len(cells):
+                    dot.edge(f"NodeR{row}_C{col}", f"NodeR{row}_C{cells[j + 1][0]}")
+                if (row, col) in below:
+                    dot.edge(f"NodeR{row}_C{col}", f"NodeR{below[(row, col)]}_C{col}")
+
+        # Render the graph
+        image_data = render_dot(dot.source)
+        image_base64 = base64.b64encode(image_data).decode("utf-8")
+        return image_base64
+
+    def plot_v2(self):
+        """Same DOT output as SparseMatrix.plot_v2(), generated from the arrays."""
+        try:
+            header_parts = [
+                "digraph G {",
+                '    graph [pad="0.5", nodesep="1", ranksep="1"];',
+                '    label="Sparse Matrix"',
+                "    node [shape=box, height=0.8];\n",
+            ]
+
+            row_definitions = []
+            row_connections = []
+            inner_nodes = []
+            inner_ranks = []
+
+            # 1. PLOT FROM ROWS
+            for r, row in enumerate(self.row_ids):
+                row_definitions.append(
+                    f'\tRow{row}[style="filled" label="{row}" fillcolor="white" group=0];'
+                )
+                if r + 1 < len(self.row_ids):
+                    row_connections.append(f"\tRow{row} -> Row{self.row_ids[r + 1]};")
+
+                rank_group = [f"Row{row}"]
+                cells = self._row_cells(r)
+                for j, (col, value) in enumerate(cells):
+                    node_id = f"NodeR{row}_C{col}"
+                    inner_nodes.append(
+                        f'\t{node_id}[style="filled" label="{value}" fillcolor="{value}" fontcolor="{value}" group={col}];'
+                    )
+                    rank_group.append(node_id)
+                    if j == 0:
+                        inner_nodes.append(f'\tRow{row} -> {node_id}[dir=""];')
+                    if j + 1 < len(cells):
+                        inner_nodes.append(
+                            f"\t{node_id} -> NodeR{row}_C{cells[j + 1][0]};"
+                        )
+                inner_ranks.append(f'\t{{ rank = same; {"; ".join(rank_group)}; }}')
+
+            # 2. PLOT COLUMNS
+            col_definitions = []
+            col_connections = []
+            col_ranks = ["\t{ rank = same;"]
+            for c, (column, rows) in enumerate(self._column_chunks()):
+                col_definitions.append(
+                    f'\tColumn{column}[style="filled" label="{column}" fillcolor="white" group={column}];'
+                )
+                col_ranks.append(f"Column{column};")
+                if c + 1 < len(self.column_ids):
+                    col_connections.append(
+                        f"\tColumn{column} -> Column{self.column_ids[c + 1]};"
+                    )
+                for i, row in enumerate(rows):
+                    node_id = f"NodeR{row}_C{column}"
+                    if i == 0:
+                        col_connections.append(f'\tColumn{column} -> {node_id}[dir=""];')
+                    if i + 1 < len(rows):
+                        col_connections.append(
+                            f"\t{node_id} -> NodeR{rows[i + 1]}_C{column};"
+                        )
+            col_ranks.append("}")
+
+            full_dot_parts = (
+                header_parts
+                + row_definitions
+                + ['    edge[dir="both"];']
+                + row_connections
+                + ['    edge[dir="both"];']
+                + col_definitions
+                + col_connections
+                + ["".join(col_ranks)]
+                + inner_nodes
+                + inner_ranks
+                + ["}"]
+            )
+
+            dotcode = "\n".join(full_dot_parts)
+
+            image_data = render_dot(dotcode)
+            image_base64 = base64.b64encode(image_data).decode("utf-8")
+
+            return image_base64
+
+        except Exception as e:
+            print(f"Error generating plot: {e}")
+            return ""
+
+    def plot_svg(self):
+        """
+        Renders the matrix as an SVG pixel grid without a Graphviz layout.
+
+        Returns:
+            str: The base64 representation of the SVG.
+        """
+        return render_svg(self)
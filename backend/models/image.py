@@ -2,15 +2,22 @@ class Image:
     """
     Represents an image with its attributes.
 
+    The pixels can be given as a list, or as a `design` loader that builds them
+    from the stored design only when `pixels` is first accessed, so listing
+    images doesn't create a Pixel for every stored pixel.
+
     Attributes:
         id (str): Unique identifier for the image.
         user_id (str): ID of the user associated with the image.
         name (str): Name of the image.
-        pixels (list): Pixel data of the image.
+        pixels (list): Pixel data of the image, materialized on first access.
+        pixel_count (int): Number of pixels, known without materializing them.
         edited (bool): Indicates if the image has been edited (default is False).
     """
 
-    def __init__(self, id, user_id, name, pixels, edited=False):
+    def __init__(
+        self, id, user_id, name, pixels, edited=False, design=None, pixel_count=None
+    ):
         """
         Initializes an Image instance.
 
@@ -18,10 +25,34 @@ class Image:
             id (str): Unique identifier for the image.
             user_id (str): ID of the user associated with the image.
             name (str): Name of the image.
-            pixels (list): Pixel data of the image.
+            pixels (list): Pixel data of the image, or None if `design` is given.
+            edited (bool): Indicates if the image has been edited.
+            design (callable, optional): Returns the pixel list when first needed.
+            pixel_count (int, optional): Number of pixels `design` will return.
         """
         self.id = id
         self.user_id = user_id
         self.name = name
-        self.pixels = pixels
+        self._pixels = pixels
+        self._design = design if pixels is None else None
+        self._pixel_count = pixel_count
         self.edited = edited
+
+    @property
+    def pixels(self):
+        if self._pixels is None and self._design is not None:
+            self._pixels = self._design()
+            self._design = None  # Release the raw design
+        return self._pixels
+
+    @pixels.setter
+    def pixels(self, pixels):
+        self._pixels = pixels
+        self._design = None
+        self._pixel_count = None
+
+    @property
+    def pixel_count(self):
+        if self._pixels is None and self._pixel_count is not None:
+            return self._pixel_count
+        return len(self.pixels or ())
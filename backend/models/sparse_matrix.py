@@ -1,5 +1,8 @@
 import base64
-from graphviz import Source, Digraph
+from bisect import bisect_left, bisect_right, insort
+from graphviz import Digraph
+from utils.render_executor import render_dot
+from utils.svg_renderer import render_svg
 
 
 class HeaderList:
@@ -8,11 +11,18 @@ class HeaderList:
         self.first = None
         self.last = None
         self.size = 0
+        # Hash index of header id -> HeaderNode, plus the ids in ascending order,
+        # so lookups and ordered insertion don't have to walk the linked list
+        self.index = {}
+        self.keys = []
 
     def __len__(self):
         return self.size
 
     def insertHeaderNode(self, new):
+        # -- HEADER ALREADY EXISTS, NOTHING TO INSERT
+        if new.id in self.index:
+            return
         if self.first == None and self.last == None:
             self.first = new
             self.last = new
@@ -28,29 +38,38 @@ class HeaderList:
                 self.last.next = new
                 new.previous = self.last
                 self.last = new
-            # -- OTHERWISE, TRAVERSE LIST TO FIND WHERE TO PLACE NEW HEADER NODE BETWEEN FIRST AND LAST
+            # -- OTHERWISE, FIND THE NEXT HEADER WITH BISECT AND LINK NEW NODE BEFORE IT
             else:
-                current = self.first
-                while current != None:
-                    if new.id < current.id:
-                        new.next = current
-                        new.previous = current.previous
-                        current.previous.next = new
-                        current.previous = new
-                        break
-                    elif new.id > current.id:
-                        current = current.next
-                    else:
-                        break
+                current = self.index[self.keys[bisect_right(self.keys, new.id)]]
+                new.next = current
+                new.previous = current.previous
+                current.previous.next = new
+                current.previous = new
+        insort(self.keys, new.id)
+        self.index[new.id] = new
         self.size += 1
 
     def getHeader(self, id):
-        current = self.first
-        while current != None:
-            if current.id == id:
-                return current
-            current = current.next
-        return None
+        return self.index.get(id)
+
+    def removeHeaderNode(self, id):
+        header = self.index.pop(id, None)
+        if header == None:
+            return None
+        # -- UNLINK HEADER FROM ITS NEIGHBOURS
+        if header.previous != None:
+            header.previous.next = header.next
+        else:
+            self.first = header.next
+        if header.next != None:
+            header.next.previous = header.previous
+        else:
+            self.last = header.previous
+        header.next = None
+        header.previous = None
+        del self.keys[bisect_left(self.keys, id)]
+        self.size -= 1
+        return header
 
     def showHeaders(self):
         current = self.first
@@ -65,6 +84,9 @@ class HeaderNode:
         self.next = None
         self.previous = None
         self.access = None
+        # Coordinates of the cells in this row/column, ascending, to find the
+        # neighbours of a new cell by bisection instead of walking the list
+        self.keys = []
 
 
 class CellNode:
@@ -82,10 +104,134 @@ class SparseMatrix:
     def __init__(self):
         self.rows = HeaderList("row")
         self.columns = HeaderList("column")
+        # Coordinate index (x, y) -> CellNode for random access
+        self.cells = {}
+
+    def __len__(self):
+        return len(self.cells)
+
+    @classmethod
+    def from_pixels(cls, pixels):
+        """
+        Builds a sparse matrix from a list of pixels in a single bulk pass.
+
+        Pixels are sorted once by (row, column) and once by (column, row), and
+        the cell pointers are linked in linear passes instead of walking a row
+        and a column per insert. Duplicate coordinates keep the first pixel, the
+        same as insert().
+
+        Args:
+            pixels (list[Pixel]): Pixels to place in the matrix.
+
+        Returns:
+            SparseMatrix: The populated matrix.
+        """
+        matrix = cls()
+
+        # 1. Create one cell per coordinate, keeping the first occurrence
+        cells = {}
+        for pixel in pixels:
+            if (pixel.row, pixel.column) not in cells:
+                cells[(pixel.row, pixel.column)] = CellNode(
+                    pixel.row, pixel.column, pixel.color
+                )
+
+        # 2. Link rows (LEFT <-> RIGHT) walking cells in (row, column) order
+        previous = None
+        for key in sorted(cells):
+            cell = cells[key]
+            if previous != None and previous.x == cell.x:
+                previous.right = cell
+                cell.left = previous
+            else:
+                header = HeaderNode(cell.x)
+                header.access = cell
+                matrix.rows.insertHeaderNode(header)
+            header.keys.append(cell.y)
+            previous = cell
+
+        # 3. Link columns (UP <-> DOWN) walking cells in (column, row) order
+        previous = None
+        for key in sorted(cells, key=lambda key: (key[1], key[0])):
+            cell = cells[key]
+            if previous != None and previous.y == cell.y:
+                previous.down = cell
+                cell.up = previous
+            else:
+                header = HeaderNode(cell.y)
+                header.access = cell
+                matrix.columns.insertHeaderNode(header)
+            header.keys.append(cell.x)
+            previous = cell
+
+        matrix.cells = cells
+        return matrix
+
+    def get(self, x, y):
+        """
+        Returns the value stored at (x, y), or None if the cell is empty.
+        """
+        cell = self.cells.get((x, y))
+        return cell.value if cell != None else None
+
+    def set(self, x, y, value):
+        """
+        Stores value at (x, y), overwriting the current value if the cell exists.
+
+        Overwrites are O(1) through the coordinate index; a new cell is linked
+        with insert(), which finds its neighbours in O(log n).
+        """
+        cell = self.cells.get((x, y))
+        if cell != None:
+            cell.value = value
+        else:
+            self.insert(x, y, value)
+
+    def remove(self, x, y):
+        """
+        Removes the cell at (x, y) and drops its row/column headers when they become empty.
+
+        Returns:
+            bool: True if a cell was removed, False if (x, y) was empty.
+        """
+        cell = self.cells.pop((x, y), None)
+        if cell == None:
+            return False
+
+        # 1. UNLINK FROM ROW (LEFT <-> RIGHT)
+        header = self.rows.getHeader(x)
+        del header.keys[bisect_left(header.keys, y)]
+        if cell.left != None:
+            cell.left.right = cell.right
+        else:
+            header.access = cell.right
+            if header.access == None:
+                self.rows.removeHeaderNode(x)
+        if cell.right != None:
+            cell.right.left = cell.left
+
+        # 2. UNLINK FROM COLUMN (UP <-> DOWN)
+        header = self.columns.getHeader(y)
+        del header.keys[bisect_left(header.keys, x)]
+        if cell.up != None:
+            cell.up.down = cell.down
+        else:
+            header.access = cell.down
+            if header.access == None:
+                self.columns.removeHeaderNode(y)
+        if cell.down != None:
+            cell.down.up = cell.up
+
+        cell.left = cell.right = cell.up = cell.down = None
+        return True
 
     def insert(self, x, y, value):
+        # IF THE CELL ALREADY EXISTS WE DON'T OVERWRITE THE value (use set() for that)
+        if (x, y) in self.cells:
+            return
         # Create new cell node to add
         new = CellNode(x, y, value)
+        self.cells[(x, y)] = new
         # 1. Check if headers for rows or columns already exist in matrix
         cell_x = self.rows.getHeader(x)
         cell_y = self.columns.getHeader(y)
@@ -102,105 +248,58 @@ class SparseMatrix:
             cell_y = HeaderNode(y)
             self.columns.insertHeaderNode(cell_y)
 
-        # 3. Proceed to insert new cell into matrix
-        # 3.1 INSERT NEW CELL IN ROW
-        # 3.1.1. Check if cell X isn't pointing to any internal node (access)
-        if cell_x.access == None:
+        # 3. Proceed to insert new cell into matrix; its neighbours are found
+        # by bisecting the header's sorted coordinates, not by walking the list
+        # 3.1 INSERT NEW CELL IN ROW (LEFT <-> RIGHT)
+        position = bisect_left(cell_x.keys, y)
+        if position < len(cell_x.keys):
+            # NEW -> RIGHT, LEFT <- NEW <- RIGHT
+            right = self.cells[(x, cell_x.keys[position])]
+            new.right = right
+            new.left = right.left
+            right.left = new
+        elif cell_x.keys:
+            # NEW GOES AT THE END OF THE ROW
+            new.left = self.cells[(x, cell_x.keys[-1])]
+        if new.left != None:
+            new.left.right = new
+        else:
+            # NEW IS THE FIRST NODE OF THE ROW: ROWX -> NEW
             cell_x.access = new
-        # 3.1.2. If internal node already exists in row, proceed to insert cell in row
+        cell_x.keys.insert(position, y)
+
+        # 3.2 INSERT NEW CELL IN COLUMN (UP <-> DOWN)
+        position = bisect_left(cell_y.keys, x)
+        if position < len(cell_y.keys):
+            # NEW -> DOWN, UP <- NEW <- DOWN
+            down = self.cells[(cell_y.keys[position], y)]
+            new.down = down
+            new.up = down.up
+            down.up = new
+        elif cell_y.keys:
+            # NEW GOES AT THE END OF THE COLUMN
+            new.up = self.cells[(cell_y.keys[-1], y)]
+        if new.up != None:
+            new.up.down = new
         else:
-            # 3.1.2.1 If new node's column is less than first internal node's column
-            if new.y < cell_x.access.y:
-                # NEW -> ACCESS
-                new.right = cell_x.access
-                # NEW <- ACCESS
-                cell_x.access.left = new
-                # ROWX -> NEW
-                cell_x.access = new
-            # 3.1.2.2 If new node's column is greater than last internal node's column
-            else:
-                # TRAVERSE LEFT TO RIGHT IN ROW
-                current = cell_x.access
-                while current != None:
-                    # If new node's column is less than current node's column
-                    if new.y < current.y:
-                        # NEW -> CURRENT
-                        new.right = current
-                        # NEW <- CURRENT
-                        new.left = current.left
-                        # CURRENT <- NEW
-                        current.left.right = new
-                        # CURRENT -> NEW
-                        current.left = new
-                        break
-                    # IF NEW NODE'S X and Y POSITION EQUALS CURRENT NODE'S X and Y POSITION
-                    elif new.x == current.x and new.y == current.y:
-                        # IF WE WANT TO OVERWRITE THE value
-                        # current.value = value
-                        # IF WE DON'T WANT TO OVERWRITE THE value THEN DO NOTHING
-                        break
-                    # IF NEW NODE'S Y POSITION IS GREATER THAN LAST NODE'S Y POSITION
-                    else:
-                        # IF CURRENT NODE'S .RIGHT IS NULL THEN INSERT NEW NODE AT END OF ROW
-                        if current.right == None:
-                            # CURRENT -> NEW
-                            current.right = new
-                            # NEW <- CURRENT
-                            new.left = current
-                            break
-                        # IF CURRENT NODE HAS RIGHT NODE (NOT LAST NODE IN ROW)
-                        else:
-                            # MOVE TO NEXT NODE
-                            current = current.right
-
-        # 3.2 INSERT NEW CELL IN COLUMN
-        # 3.2.1. Check if cell Y isn't pointing to any internal node (access)
-        if cell_y.access == None:
+            # NEW IS THE FIRST NODE OF THE COLUMN: COLUMNY -> NEW
             cell_y.access = new
-        # 3.2.2. If internal node already exists in column, proceed to insert cell in column
-        else:
-            # IF NEW NODE'S ROW IS LESS THAN ACCESS NODE'S ROW
-            if new.x < cell_y.access.x:
-                # NEW -> ACCESS
-                new.down = cell_y.access
-                # NEW <- ACCESS
-                cell_y.access.up = new
-                # ROWY -> NEW
-                cell_y.access = new
-            # INSERT NEW NODE IN COLUMN (TOP TO BOTTOM MOVEMENT)
-            else:
-                current2 = cell_y.access
-                while current2 != None:
-                    # IF NEW NODE'S X POSITION IS LESS THAN CURRENT NODE'S X POSITION
-                    if new.x < current2.x:
-                        # NEW -> CURRENT2
-                        new.down = current2
-                        # CURRENT2.UP <- NEW
-                        new.up = current2.up
-                        # CURRENT2.UP -> NEW
-                        current2.up.down = new
-                        # NEW <- CURRENT2
-                        current2.up = new
-                        break
-                    # IF NEW NODE'S X and Y POSITION EQUALS CURRENT NODE'S X and Y POSITION
-                    elif new.x == current2.x and new.y == current2.y:
-                        # IF WE WANT TO OVERWRITE THE value
-                        # current2.value = value
-                        # IF WE DON'T WANT TO OVERWRITE THE value THEN DO NOTHING
-                        break
-                    # IF NEW NODE'S X POSITION IS GREATER THAN LAST NODE'S X POSITION
-                    else:
-                        # IF CURRENT2 NODE'S .DOWN IS NULL THEN INSERT NEW NODE AT END OF COLUMN
-                        if current2.down == None:
-                            # CURRENT2 -> NEW
-                            current2.down = new
-                            # NEW <- CURRENT2
-                            new.up = current2
-                            break
-                        # IF CURRENT2 NODE HAS DOWN NODE (NOT LAST NODE IN COLUMN)
-                        else:
-                            # MOVE TO NEXT NODE
-                            current2 = current2.down
+        cell_y.keys.insert(position, x)
+
+    def __iter__(self):
+        """
+        Iterates over the cells in row-major order.
+
+        Yields:
+            tuple: (row, column, value) for every cell in the matrix.
+        """
+        currentRow = self.rows.first
+        while currentRow != None:
+            current = currentRow.access
+            while current != None:
+                yield current.x, current.y, current.value
+                current = current.right
+            currentRow = currentRow.next
 
     def plot(self):
 
@@ -379,8 +478,7 @@ class SparseMatrix:
         dotcode += innerDirections
         dotcode += "\n}"
 
-        graph = Source(dotcode, format="svg")
-        image_data = graph.pipe()
+        image_data = render_dot(dotcode)
 
         image_base64 = base64.b64encode(image_data).decode("utf-8")
 
@@ -431,7 +529,7 @@ class SparseMatrix:
             currentRow = currentRow.next
 
         # Render the graph
-        image_data = dot.pipe()
+        image_data = render_dot(dot.source)
         image_base64 = base64.b64encode(image_data).decode("utf-8")
         return image_base64
 
@@ -563,8 +661,7 @@ class SparseMatrix:
             dotcode = "\n".join(full_dot_parts)
 
             # Generar la imagen
-            graph = Source(dotcode, format="svg")
-            image_data = graph.pipe()
+            image_data = render_dot(dotcode)
             image_base64 = base64.b64encode(image_data).decode("utf-8")
 
             return image_base64
@@ -573,3 +670,12 @@ class SparseMatrix:
             print(f"Error generating plot: {e}")
             # Retornar un string vacío o una imagen de error en base64 si falla
             return ""
+
+    def plot_svg(self):
+        """
+        Renders the matrix as an SVG pixel grid without a Graphviz layout.
+
+        Returns:
+            str: The base64 representation of the SVG.
+        """
+        return render_svg(self)
@@ -1,10 +1,8 @@
 from flask import Blueprint, request, jsonify, Response
-from xml.etree import ElementTree as ET
-from xml.dom import minidom
 from services.user_service import UsersService
 from services.image_service import ImageService
-from utils.xml_parser import parse_users
 from models.user import User
+from utils.xml_writer import XmlWriter
 from xml.sax.saxutils import escape
 import traceback
 
@@ -17,30 +15,36 @@ image_service = ImageService()
 def upload_users():
     """
     Upload users in bulk from an XML file.
+    Returns how many users were accepted and rejected, and why each was rejected.
     """
     try:
         if "file" not in request.files:
             return jsonify({"status": "error", "message": "No file provided"}), 400
 
         file = request.files["file"]
-        print(file)
         if file.filename == "":
             return jsonify({"status": "error", "message": "No file selected"}), 400
 
         if not file.filename.endswith(".xml"):
             return jsonify({"status": "error", "message": "Invalid file format"}), 400
 
-        xml_content = file.read().decode("utf-8")
-        print(xml_content)
-        users = parse_users(xml_content)
-        print(users)
-
-        users_service.save_users(users)
+        # Streamed from the upload, without reading the whole file first
+        report = users_service.import_users(file.stream)
         return (
-            jsonify({"status": "success", "message": "Users uploaded successfully"}),
+            jsonify(
+                {
+                    "status": "success",
+                    "message": f"{report['accepted']} users imported, "
+                    f"{report['rejected']} rejected",
+                    **report,
+                }
+            ),
             200,
         )
 
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
     except Exception as e:
         traceback.print_exc()
         return (
@@ -80,10 +84,59 @@ def get_all_users():
         )
 
 
+def _export_chunks(users):
+    """
+    Yields the export document, one user and then one image at a time.
+
+    Each user's images are read through the store's per-user index only when
+    the document reaches that user, so at most one image is held in memory.
+    """
+    chunks = []
+    writer = XmlWriter(chunks.append)
+    writer.declaration()
+    writer.start("usuarios")
+    for user in users:
+        writer.start("usuario", {"id": user.user_id, "pwd": user.pwd})
+        writer.text_element("NombreCompleto", escape(user.full_name))
+        writer.text_element("CorreoElectronico", escape(user.email))
+        writer.text_element("NumeroTelefono", escape(user.phone_number))
+        writer.text_element("Direccion", escape(user.address))
+        writer.text_element("Perfil", escape(user.profile_url))
+
+        writer.start("imagenes")
+        for image in image_service.iter_images(user.user_id):
+            writer.start("imagen", {"id": image.id})
+            writer.text_element("nombre", escape(image.name))
+
+            writer.start("diseño")
+            for pixel in image.pixels:
+                writer.text_element(
+                    "pixel",
+                    escape(pixel.color),
+                    {"fila": str(pixel.row), "col": str(pixel.column)},
+                )
+            writer.end()
+            writer.end()
+
+            yield "".join(chunks)
+            chunks.clear()
+        writer.end()
+        writer.end()
+
+        yield "".join(chunks)
+        chunks.clear()
+    writer.end()
+    writer.newline()
+    yield "".join(chunks)
+
+
 @admin_router.route("/export/xml", methods=["GET"])
 def export_users_as_xml():
     """
     Export all users to XML format and return as a response.
+
+    The document is streamed as it is written; each user's images are read
+    from the store only when their <usuario> element is reached.
     """
     try:
         users = users_service.get_users()
@@ -91,38 +144,11 @@ def export_users_as_xml():
         if not users:
             return jsonify({"status": "error", "message": "No users available"}), 404
 
-        root = ET.Element("usuarios")
-        for user in users:
-            user_elem = ET.SubElement(
-                root,
-                "usuario",
-                {"id": user.user_id, "pwd": user.pwd},
-            )
-            ET.SubElement(user_elem, "NombreCompleto").text = escape(user.full_name)
-            ET.SubElement(user_elem, "CorreoElectronico").text = escape(user.email)
-            ET.SubElement(user_elem, "NumeroTelefono").text = escape(user.phone_number)
-            ET.SubElement(user_elem, "Direccion").text = escape(user.address)
-            ET.SubElement(user_elem, "Perfil").text = escape(user.profile_url)
-
-            images_elem = ET.SubElement(user_elem, "imagenes")
-            images = image_service.get_images_by_user_id(user.user_id)
-            for image in images:
-                image_elem = ET.SubElement(images_elem, "imagen", {"id": image.id})
-                ET.SubElement(image_elem, "nombre").text = escape(image.name)
-
-                design_elem = ET.SubElement(image_elem, "diseño")
-                for pixel in image.pixels:
-                    ET.SubElement(
-                        design_elem,
-                        "pixel",
-                        {"fila": str(pixel.row), "col": str(pixel.column)},
-                    ).text = escape(pixel.color)
-
-        xml_str = minidom.parseString(
-            ET.tostring(root, encoding="unicode")
-        ).toprettyxml(indent="\t")
-
-        return Response(xml_str, mimetype="application/xml", status=200)
+        return Response(
+            _export_chunks(users),
+            mimetype="application/xml",
+            status=200,
+        )
 
     except Exception as e:
         traceback.print_exc()
@@ -1,18 +1,22 @@
 from flask import Blueprint, request, jsonify
-from services.image_service import ImageService
+from services.image_service import GALLERY_FIELDS, ImageService
+from services.render_queue import RenderQueue
 from utils.xml_parser import parse_image
+from utils.render_executor import get_render_executor
 from xml.etree.ElementTree import ParseError
+from config import GALLERY_MAX_LIMIT, RENDER_QUEUE_WORKERS
 
 image_router = Blueprint("image", __name__)
 image_service = ImageService()
+render_queue = RenderQueue(image_service, RENDER_QUEUE_WORKERS)
 
 
 @image_router.route("/add-image/<string:user_id>", methods=["POST"])
 def add_image(user_id):
     """
     Adds an image for a given user.
-    This function handles the process of receiving an XML file, parsing it, and adding the image to the system.
-    It returns appropriate responses based on the success or failure of these operations.
+    This function handles the process of receiving an XML file, parsing it, and storing the image design.
+    The graph is rendered in the background; poll /image/render-status/<job_id> for the result.
     Args:
         user_id (int): The ID of the user to whom the image belongs.
     Returns:
@@ -20,8 +24,8 @@ def add_image(user_id):
     Possible Responses:
         - 400: If no file is provided or the file content is empty.
         - 400: If there is an error parsing the XML content.
-        - 201: If the image is added successfully, including the image ID and graph.
-        - 409: If there is a conflict or error adding the image.
+        - 202: If the image is stored and its render queued, including the image ID and job ID.
+        - 409: If an image with the same ID already exists.
         - 500: If there is an internal server error.
     """
     try:
@@ -47,21 +51,24 @@ def add_image(user_id):
 
         image.id = None
 
-        result = image_service.add_image(image)
-        if result["success"]:
+        if not image_service.store_image(image):
             return (
-                jsonify(
-                    {
-                        "status": "success",
-                        "message": "Image added successfully.",
-                        "image_id": result["image_id"],
-                        "graph": result["graph"],
-                    }
-                ),
-                201,
+                jsonify({"status": "error", "message": "Image already exists."}),
+                409,
             )
-        else:
-            return (jsonify({"status": "error", "message": result["message"]}), 409)
+
+        job = render_queue.submit(image)
+        return (
+            jsonify(
+                {
+                    "status": "success",
+                    "message": "Image stored, render queued.",
+                    "image_id": image.id,
+                    "job_id": job.id,
+                }
+            ),
+            202,
+        )
 
     except Exception as e:
         return (
@@ -77,31 +84,38 @@ def transform_image(image_id, filter_type):
     """
     Transforms an image by applying a specified filter (grayscale or sepia).
 
+    The transformed design is stored right away and its graph is rendered in the
+    background; poll /image/render-status/<job_id> for the result.
+
     Args:
         image_id (str): The ID of the image to transform.
         filter_type (str): The type of filter to apply ('grayscale' or 'sepia').
 
     Returns:
-        JSON response containing:
-            - success (bool): Whether the transformation was successful.
+        JSON response (202) containing:
+            - success (bool): Whether the transformation was queued.
             - image_id (str): The ID of the new transformed image.
-            - graph (str): Base64-encoded graph of the transformed image.
+            - job_id (str): The ID of the render job of the transformed image.
+            - original_graph (str): Base64-encoded graph of the original image.
             - message (str): Any relevant message or error details.
     """
     try:
-        # Call the service to transform the image
-        result = image_service.transform_image(image_id, filter_type)
+        # Call the service to store the transformed image, then queue its render
+        transformed_image = image_service.create_transformed_image(
+            image_id, filter_type
+        )
+        job = render_queue.submit(transformed_image, edited=True)
         return (
             jsonify(
                 {
                     "success": True,
-                    "image_id": result["image_id"],
+                    "image_id": transformed_image.id,
+                    "job_id": job.id,
                     "original_graph": image_service.get_image_graph(image_id),
-                    "transformed_graph": result["transformed_graph"],
-                    "message": "Image transformed successfully.",
+                    "message": "Image transformed, render queued.",
                 }
             ),
-            200,
+            202,
         )
     except ValueError as e:
         return jsonify({"success": False, "message": str(e)}), 400
@@ -112,20 +126,85 @@ def transform_image(image_id, filter_type):
         )
 
 
+@image_router.route("/render-status/<string:job_id>", methods=["GET"])
+def get_render_status(job_id):
+    """
+    Retrieves the status of a background render job.
+
+    Args:
+        job_id (str): The job ID returned by add-image or transform-image.
+
+    Returns:
+        JSON response containing:
+            - success (bool): Whether the job was found.
+            - state (str): 'queued', 'running', 'done' or 'failed'.
+            - graph (str): Base64-encoded graph once the state is 'done'.
+            - message (str): Any relevant message or error details.
+    """
+    try:
+        job = render_queue.get(job_id)
+        if job is None:
+            return jsonify({"success": False, "message": "Render job not found."}), 404
+
+        return jsonify({"success": True, **job, "message": job["error"] or ""}), 200
+    except Exception as e:
+        return (
+            jsonify({"success": False, "message": f"Internal Server Error: {e}"}),
+            500,
+        )
+
+
 @image_router.route("/gallery", methods=["GET"])
 def get_all_gallery():
     """
-    Retrieves the gallery of all images.
+    Retrieves the gallery of images, ordered by image ID.
+
+    Query parameters (all optional):
+        - limit (int): Page size, at most GALLERY_MAX_LIMIT. All images if omitted.
+        - after (str): ID of the last image of the previous page (the `next_after` of that page).
+        - user (str): Only return images of this user.
+        - fields (str): Comma-separated keys to return out of id, id_usuario,
+          editado and base64; leave out base64 to list metadata only.
 
     Returns:
         JSON response containing:
             - success (bool): Whether the retrieval was successful.
             - gallery (list): List of image metadata (id, user_id, base64).
+            - next_after (str | None): Cursor of the next page, None on the last page.
             - message (str): Any relevant message or error details.
     """
     try:
-        # Call the service to get all gallery images
-        gallery = image_service.get_all_gallery_images()
+        limit = request.args.get("limit")
+        if limit is not None:
+            if not limit.isdigit() or int(limit) < 1:
+                return (
+                    jsonify({"success": False, "message": "Invalid limit."}),
+                    400,
+                )
+            limit = min(int(limit), GALLERY_MAX_LIMIT)
+
+        fields = request.args.get("fields")
+        if fields is not None:
+            fields = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = [field for field in fields if field not in GALLERY_FIELDS]
+            if unknown:
+                return (
+                    jsonify(
+                        {
+                            "success": False,
+                            "message": f"Unknown fields: {', '.join(unknown)}.",
+                        }
+                    ),
+                    400,
+                )
+
+        # Call the service to get the requested page of the gallery
+        gallery, next_after = image_service.get_gallery_page(
+            limit=limit,
+            after=request.args.get("after"),
+            user_id=request.args.get("user"),
+            fields=fields,
+        )
 
         if not gallery:
             return (
@@ -133,6 +212,7 @@ def get_all_gallery():
                     {
                         "success": True,
                         "gallery": [],
+                        "next_after": None,
                         "message": "No images found.",
                     }
                 ),
@@ -144,6 +224,7 @@ def get_all_gallery():
                 {
                     "success": True,
                     "gallery": gallery,
+                    "next_after": next_after,
                     "message": "Gallery retrieved successfully.",
                 }
             ),
@@ -154,3 +235,32 @@ def get_all_gallery():
             jsonify({"success": False, "message": f"Internal Server Error: {e}"}),
             500,
         )
+
+
+@image_router.route("/render-stats", methods=["GET"])
+def get_render_stats():
+    """
+    Retrieves the render cache counters and the Graphviz executor metrics.
+
+    Returns:
+        JSON response containing:
+            - success (bool): Whether the retrieval was successful.
+            - cache (dict): Hits, misses, entries and size of the render cache.
+            - executor (dict): Render counts, durations, output sizes and queue depth.
+    """
+    try:
+        return (
+            jsonify(
+                {
+                    "success": True,
+                    "cache": image_service.render_cache.stats(),
+                    "executor": get_render_executor().metrics(),
+                }
+            ),
+            200,
+        )
+    except Exception as e:
+        return (
+            jsonify({"success": False, "message": f"Internal Server Error: {e}"}),
+            500,
+        )
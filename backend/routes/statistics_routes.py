@@ -10,14 +10,12 @@ image_service = ImageService()
 @statistics_router.route("/top-users", methods=["GET"])
 def get_top_users():
     try:
-        # Obtener todas las imágenes
-        gallery_images = image_service.get_all_gallery_images()
-
-        # Contar las imágenes por usuario
-        user_counts = {}
-        for image in gallery_images:
-            user_id = image["id_usuario"]
-            user_counts[user_id] = user_counts.get(user_id, 0) + 1
+        # Leer los contadores de imágenes por usuario (sin leer las imágenes)
+        statistics = image_service.get_statistics()
+        user_counts = {
+            user_id: counts["images"]
+            for user_id, counts in statistics["users"].items()
+        }
 
         # Ordenar y obtener los top 3
         sorted_users = sorted(user_counts.items(), key=lambda x: x[1], reverse=True)[:3]
@@ -34,15 +32,13 @@ def get_top_users():
 @statistics_router.route("/edited-images", methods=["GET"])
 def get_edited_images():
     try:
-        # Obtener todas las imágenes
-        gallery_images = image_service.get_all_gallery_images()
-
-        # Filtrar imágenes editadas y contarlas por usuario
-        edited_counts = {}
-        for image in gallery_images:
-            if image.get("editado") == "1":  # Verifica que sean imágenes editadas
-                user_id = image["id_usuario"]
-                edited_counts[user_id] = edited_counts.get(user_id, 0) + 1
+        # Leer los contadores de imágenes editadas por usuario
+        statistics = image_service.get_statistics()
+        edited_counts = {
+            user_id: counts["edited"]
+            for user_id, counts in statistics["users"].items()
+            if counts["edited"]  # Solo usuarios con imágenes editadas
+        }
 
         # Ordenar en orden descendente
         sorted_edited_users = sorted(
@@ -56,3 +52,16 @@ def get_edited_images():
         return jsonify({"status": "success", "data": edited_users})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)})
+
+
+@statistics_router.route("/rebuild", methods=["POST"])
+def rebuild_statistics():
+    """
+    Recounts the stored images into the statistics counters, for instance after
+    images were imported or migrated by another tool.
+    """
+    try:
+        statistics = image_service.rebuild_statistics()
+        return jsonify({"status": "success", "data": statistics})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
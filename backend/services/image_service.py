@@ -1,14 +1,41 @@
 import os
-from xml.etree import ElementTree as ET
-from xml.dom import minidom
-from xml.sax.saxutils import escape
 from models.image import Image  # Import the Image model
 from models.pixel import Pixel  # Import the Pixel model
 from models.sparse_matrix import SparseMatrix  # Import the SparseMatrix model
-from utils.color_utils import (
-    hex_to_rgb,
-    rgb_to_hex,
-)  # Import the color conversion functions
+from models.compact_sparse_matrix import CompactSparseMatrix
+from storage.xml_image_store import XmlImageStore
+from storage.log_image_store import LogImageStore
+from storage.sqlite_store import SqliteImageStore
+from storage.id_allocator import IdAllocator
+from storage.image_statistics import ImageStatistics
+from config import IMAGE_STORE, MATRIX_ENGINE, RENDERER, RENDER_CACHE_MAX_BYTES
+from utils.image_filters import (
+    PALETTE_MAX_RATIO,
+    apply_filter_batch,
+    apply_filter_palette,
+    color_palette,
+)  # Import the batched color filters
+from utils.render_cache import RenderCache
+
+IMAGE_STORES = {
+    "xml": XmlImageStore,
+    "log": LogImageStore,
+    "sqlite": SqliteImageStore,
+}
+
+# Keys of a gallery entry, in the order they are returned
+GALLERY_FIELDS = ("id", "id_usuario", "editado", "base64")
+
+MATRIX_ENGINES = {
+    "linked": SparseMatrix,
+    "compact": CompactSparseMatrix,
+}
+
+# Renderer name -> (cache id, matrix method)
+RENDERERS = {
+    "graphviz": ("graphviz-plot", "plot"),
+    "svg": ("svg-grid", "plot_svg"),
+}
 
 
 class ImageService:
@@ -17,79 +44,75 @@ class ImageService:
 
     Attributes:
         storage_path (str): Path to the directory where the XML file is stored.
-        images_file (str): Path to the images XML file.
+        store (ImageStore): Storage engine of designs and renders.
+        id_allocator (IdAllocator): Persistent counter handing out image IDs.
+        statistics (ImageStatistics): Persistent counters of images per user.
+        matrix_engine (type): Sparse matrix class used to build and render designs.
+        renderer (str): Name of the renderer used for gallery and preview images.
+        render_cache (RenderCache): Cache of rendered designs, keyed by content.
     """
 
     def __init__(self):
         """
-        Initializes the ImageService and ensures the XML file exists.
+        Initializes the ImageService and its storage engine.
         """
         self.storage_path = os.path.abspath("database")
-        self.images_file = os.path.join(self.storage_path, "imagenes.xml")
-        self.base64_file = os.path.join(self.storage_path, "imagenes_base64.xml")
 
-        # Create storage directory if it doesn't exist
-        os.makedirs(self.storage_path, exist_ok=True)
+        if IMAGE_STORE not in IMAGE_STORES:
+            raise ValueError(f"Unknown image store: {IMAGE_STORE}")
 
-        # Initialize XML file if it doesn't exist
-        self._initialize_images_file()
-        self._initialize_base64_file()
+        if MATRIX_ENGINE not in MATRIX_ENGINES:
+            raise ValueError(f"Unknown matrix engine: {MATRIX_ENGINE}")
+        self.matrix_engine = MATRIX_ENGINES[MATRIX_ENGINE]
 
-    def _initialize_images_file(self):
-        """
-        Initializes the images XML file if it does not already exist.
-        """
-        if not os.path.exists(self.images_file):
-            root = ET.Element("imagenes")
-            tree = ET.ElementTree(root)
-            self._write_pretty_xml(tree, self.images_file)
+        if RENDERER not in RENDERERS:
+            raise ValueError(f"Unknown renderer: {RENDERER}")
+        self.renderer = RENDERER
 
-    def _initialize_base64_file(self):
-        """
-        Initializes the base64 XML file if it does not already exist.
-        """
-        if not os.path.exists(self.base64_file):
-            root = ET.Element("imagenes_base64")
-            tree = ET.ElementTree(root)
-            self._write_pretty_xml(tree, self.base64_file)
+        # Create the storage engine (and its files if they don't exist)
+        self.store = IMAGE_STORES[IMAGE_STORE](self.storage_path)
 
-    def _write_pretty_xml(self, tree, file_path):
-        """Write XML with compact formatting"""
-        try:
+        # Persistent counter of image IDs, moved past any ID already stored
+        self.id_allocator = IdAllocator(
+            os.path.join(self.storage_path, "image_id.counter"), self.store.get_max_id
+        )
+        self.id_allocator.sync()
 
-            def _indent(elem, level=0):
-                i = "\n" + level * "  "
-                if len(elem):
-                    if not elem.text or not elem.text.strip():
-                        elem.text = i + "  "
-                    if not elem.tail or not elem.tail.strip():
-                        elem.tail = i
-                    for subelem in elem:
-                        _indent(subelem, level + 1)
-                    if not elem.tail or not elem.tail.strip():
-                        elem.tail = i
-                else:
-                    if level and (not elem.tail or not elem.tail.strip()):
-                        elem.tail = i
+        # Counters of images per user, updated as images are stored
+        self.statistics = ImageStatistics(
+            os.path.join(self.storage_path, "statistics.json"), self.store.iter_images
+        )
 
-            root = tree.getroot()
-            _indent(root)
-            tree.write(file_path, encoding="utf-8", xml_declaration=True)
-        except Exception as e:
-            raise Exception(f"Error writing XML: {str(e)}")
+        self.render_cache = RenderCache(
+            os.path.join(self.storage_path, "render_cache"), RENDER_CACHE_MAX_BYTES
+        )
+
+    def _render(self, sparse_matrix):
+        """
+        Renders a sparse matrix to base64, reusing a cached render of the same content.
+
+        Args:
+            sparse_matrix (SparseMatrix | CompactSparseMatrix): Matrix to render.
+
+        Returns:
+            str: The base64 representation of the rendered graph.
+        """
+        renderer_id, method = RENDERERS[self.renderer]
+        return self.render_cache.get_or_render(
+            sparse_matrix, renderer_id, getattr(sparse_matrix, method)
+        )
 
-    def _image_exists(self, image_id, root):
+    def _image_exists(self, image_id):
         """
         Checks if an image with the given ID already exists.
 
         Args:
             image_id (str): ID of the image to check.
-            root (Element): Root element of the XML tree.
 
         Returns:
             bool: True if the image exists, False otherwise.
         """
-        return root.find(f"./imagen[@id='{image_id}']") is not None
+        return self.store.image_exists(image_id)
 
     def _generate_next_id(self):
         """
@@ -99,15 +122,8 @@ class ImageService:
             str: El nuevo ID en formato '0001', '0002', etc.
         """
         try:
-            tree = ET.parse(self.images_file)
-            root = tree.getroot()
-
-            # Obtener todos los IDs existentes
-            ids = [int(image_elem.get("id")) for image_elem in root.findall("imagen")]
-            next_id = max(ids) + 1 if ids else 1
-
-            # Retornar el ID en formato de cuatro dígitos
-            return f"{next_id:04d}"
+            # Reservar el siguiente ID del contador persistente (sin leer las imágenes)
+            return self.id_allocator.allocate()
         except Exception as e:
             raise Exception(f"Error generating next ID: {e}")
 
@@ -122,87 +138,80 @@ class ImageService:
             edited (bool): False if the image is original, True if edited.
         """
         try:
-            tree = ET.parse(self.base64_file)
-            root = tree.getroot()
-
-            # Check if base64 for the image already exists
-            base64_elem = root.find(f"./imagen[@id='{image_id}']")
-            if base64_elem is not None:
-                base64_elem.text = escape(base64_data)  # Update if it exists
-                base64_elem.set("id_usuario", escape(user_id))  # Update user ID
-                base64_elem.set(
-                    "editado", "1" if edited else "0"
-                )  # Update edited status
-            else:
-                # Add a new base64 entry
-                ET.SubElement(
-                    root,
-                    "imagen",
-                    {
-                        "id": escape(image_id),
-                        "id_usuario": escape(user_id),
-                        "editado": "1" if edited else "0",
-                    },
-                ).text = escape(base64_data)
-
-            self._write_pretty_xml(tree, self.base64_file)
+            self.store.save_base64(image_id, base64_data, user_id, edited)
         except Exception as e:
             raise Exception(f"Error saving base64 data: {e}")
 
-    def add_image(self, image):
+    def store_image(self, image, edited=False):
         """
-        Adds a new image to the XML file.
+        Persists the design of an image in the XML file, without rendering it.
 
         Args:
-            image (Image): Image object to add.
+            image (Image): Image object to store. An ID is assigned if it has none.
+            edited (bool): False if the image is original, True if edited.
 
         Returns:
-            bool: True if the image was added, False if an image with the same ID already exists.
+            bool: True if the image was stored, False if an image with the same ID already exists.
         """
         try:
-            tree = ET.parse(self.images_file)
-            root = tree.getroot()
+            # Stored and counted under the statistics lock, so a recount never
+            # sees an image that isn't counted yet
+            with self.statistics.recording() as record:
+                if image.id:
+                    if not self.store.add_image(image, edited):
+                        return False
+                else:
+                    # An allocated ID can only be taken if images were added behind
+                    # the counter's back; keep allocating until a free one comes up.
+                    image.id = self._generate_next_id()
+                    while not self.store.add_image(image, edited):
+                        image.id = self._generate_next_id()
+
+                record(image.user_id, edited)
+                return True
+
+        except Exception as e:
+            raise Exception(f"Error storing image: {e}")
+
+    def render_image(self, image, edited=False):
+        """
+        Renders the design of a stored image and saves its base64 representation.
+
+        Args:
+            image (Image): Image object to render. Must already have an ID.
+            edited (bool): False if the image is original, True if edited.
+
+        Returns:
+            str: The base64 representation of the rendered graph.
+        """
+        sparse_matrix = self.matrix_engine.from_pixels(
+            image.pixels
+        )  # Build the sparse matrix in a single bulk pass
+
+        graph_base64 = self._render(
+            sparse_matrix
+        )  # Convert the sparse matrix to base64
+
+        self.save_base64(
+            image.id, graph_base64, image.user_id, edited=edited
+        )  # Save the base64 data
+        return graph_base64
 
-            if not image.id:
-                image.id = self._generate_next_id()
+    def add_image(self, image):
+        """
+        Adds a new image to the XML file and renders it.
 
-            if self._image_exists(image.id, root):
+        Args:
+            image (Image): Image object to add.
+
+        Returns:
+            dict | bool: The new image ID and graph, or False if an image with the same ID already exists.
+        """
+        try:
+            if not self.store_image(image):
                 return False
 
-            image_elem = ET.SubElement(
-                root,
-                "imagen",
-                {
-                    "id": escape(image.id),
-                    "id_usuario": escape(image.user_id),
-                    "editado": "0",
-                },
-            )
-            ET.SubElement(image_elem, "nombre").text = escape(image.name)
-
-            # Add the design (pixels)
-            design_elem = ET.SubElement(image_elem, "diseño")
-            sparse_matrix = SparseMatrix()  # Create a SparseMatrix object
-            for pixel in image.pixels:
-                ET.SubElement(
-                    design_elem,
-                    "pixel",
-                    {"fila": str(pixel.row), "col": str(pixel.column)},
-                ).text = escape(pixel.color)
-
-                sparse_matrix.insert(
-                    pixel.row, pixel.column, pixel.color
-                )  # Insert the pixel into the sparse matrix
-
-            graph_base64 = sparse_matrix.plot()  # Convert the sparse matrix to base64
-
-            self.save_base64(
-                image.id, graph_base64, image.user_id
-            )  # Save the base64 data
-
-            self._write_pretty_xml(
-                tree, self.images_file
-            )  # Save the changes to the XML file
+            graph_base64 = self.render_image(image)
             return {"success": True, "image_id": image.id, "graph": graph_base64}
 
         except Exception as e:
@@ -219,14 +228,11 @@ class ImageService:
             str: The base64 representation of the image.
         """
         try:
-            tree = ET.parse(self.base64_file)
-            root = tree.getroot()
-
-            base64_elem = root.find(f"./imagen[@id='{image_id}']")
-            if base64_elem is None or not base64_elem.text:
+            base64_data = self.store.get_base64(image_id)
+            if not base64_data:
                 raise ValueError("Base64 representation not found for the image.")
 
-            return base64_elem.text
+            return base64_data
         except Exception as e:
             raise Exception(f"Error retrieving base64 data: {e}")
 
@@ -241,24 +247,100 @@ class ImageService:
             list[dict]: A list of dictionaries containing image metadata.
         """
         try:
-            tree = ET.parse(self.base64_file)
-            root = tree.getroot()
-
-            gallery_images = []
-            for image_elem in root.findall("imagen"):
-                gallery_images.append(
-                    {
-                        "id": image_elem.get("id"),
-                        "id_usuario": image_elem.get("id_usuario"),
-                        "editado": image_elem.get("editado"),
-                        "base64": image_elem.text,
-                    }
-                )
-
-            return gallery_images
+            return self.store.get_gallery_images()
         except Exception as e:
             raise Exception(f"Error retrieving gallery images: {e}")
 
+    def get_all_gallery_metadata(self):
+        """
+        Retrieves id, id_usuario and editado of every rendered image, without reading the renders.
+
+        Returns:
+            list[dict]: A list of dictionaries containing image metadata.
+        """
+        try:
+            return self.store.get_render_metadata()
+        except Exception as e:
+            raise Exception(f"Error retrieving gallery metadata: {e}")
+
+    def get_statistics(self):
+        """
+        Retrieves the counters of stored images, without reading the image store.
+
+        Returns:
+            dict: total_images, total_edited and, per user ID, images and edited.
+        """
+        try:
+            return self.statistics.get()
+        except Exception as e:
+            raise Exception(f"Error retrieving statistics: {e}")
+
+    def rebuild_statistics(self):
+        """
+        Recounts the stored images into the statistics counters.
+
+        Returns:
+            dict: The rebuilt statistics.
+        """
+        try:
+            return self.statistics.rebuild()
+        except Exception as e:
+            raise Exception(f"Error rebuilding statistics: {e}")
+
+    def get_gallery_page(self, limit=None, after=None, user_id=None, fields=None):
+        """
+        Retrieves one page of the gallery, ordered by image ID.
+
+        Args:
+            limit (int, optional): Maximum number of images, all of them if None.
+            after (str, optional): ID of the last image of the previous page.
+            user_id (str, optional): Only return images of this user.
+            fields (list[str], optional): Keys to include in each entry, out of
+                GALLERY_FIELDS; all of them if None. Renders are only read if
+                'base64' is requested.
+
+        Returns:
+            tuple[list[dict], str | None]: The page, and the ID to request the next one with.
+        """
+        try:
+            fields = list(fields) if fields else list(GALLERY_FIELDS)
+            page, next_after = self.store.get_gallery_page(
+                limit, after, user_id, with_base64="base64" in fields
+            )
+            return [{field: entry[field] for field in fields} for entry in page], next_after
+        except Exception as e:
+            raise Exception(f"Error retrieving gallery page: {e}")
+
+    def get_image(self, image_id):
+        """
+        Retrieves a single image by its ID, without reading any other image.
+
+        Args:
+            image_id (str): The ID of the image.
+
+        Returns:
+            Image: The image, or None if it doesn't exist. Its pixels are loaded on first access.
+        """
+        try:
+            return self.store.get_image(image_id)
+        except Exception as e:
+            raise Exception(f"Error retrieving image {image_id}: {e}")
+
+    def iter_images(self, user_id=None):
+        """
+        Streams the stored images, or only those of a user, one at a time.
+
+        Args:
+            user_id (str, optional): ID of the user to filter by.
+
+        Yields:
+            Image: Each image, in storage order; stop iterating to stop reading.
+        """
+        try:
+            yield from self.store.iter_images(user_id)
+        except Exception as e:
+            raise Exception(f"Error retrieving images: {e}")
+
     def get_all_images(self):
         """
         Retrieves all images from the XML file.
@@ -267,33 +349,7 @@ class ImageService:
             list[Image]: List of Image objects.
         """
         try:
-            tree = ET.parse(self.images_file)
-            root = tree.getroot()
-
-            images = []
-            for image_elem in root.findall("imagen"):
-                # Parse pixels
-                pixels = []
-                for pixel_elem in image_elem.find("diseño").findall("pixel"):
-                    pixel = Pixel(
-                        row=int(pixel_elem.get("fila")),
-                        column=int(pixel_elem.get("col")),
-                        color=pixel_elem.text,
-                    )
-                    pixels.append(pixel)
-
-                # Create Image object
-                image = Image(
-                    id=image_elem.get("id"),
-                    user_id=image_elem.get("id_usuario"),
-                    name=image_elem.find("nombre").text or "",
-                    pixels=pixels,
-                )
-                image.edited = image_elem.get("editado") == "1"
-                images.append(image)
-
-            return images
-
+            return self.store.get_images()
         except Exception as e:
             raise Exception(f"Error retrieving images: {e}")
 
@@ -308,34 +364,35 @@ class ImageService:
             list[Image]: List of Image objects associated with the user ID.
         """
         try:
-            tree = ET.parse(self.images_file)
-            root = tree.getroot()
-
-            images = []
-            for image_elem in root.findall(f"./imagen[@id_usuario='{user_id}']"):
-                pixels = [
-                    Pixel(
-                        row=int(pixel_elem.get("fila")),
-                        column=int(pixel_elem.get("col")),
-                        color=pixel_elem.text,
-                    )
-                    for pixel_elem in image_elem.find("diseño").findall("pixel")
-                ]
-
-                image = Image(
-                    id=image_elem.get("id"),
-                    user_id=image_elem.get("id_usuario"),
-                    name=image_elem.find("nombre").text or "",
-                    pixels=pixels,
-                )
-                image.edited = image_elem.get("editado") == "1"
-                images.append(image)
-
-            return images
-
+            return self.store.get_images(user_id)
         except Exception as e:
             raise Exception(f"Error retrieving images for user ID {user_id}: {e}")
 
+    def _filter_pixels(self, image, filter_type):
+        """
+        Applies a color filter to every pixel of an image in one batched pass.
+
+        Images with a small palette are filtered once per distinct color through a
+        lookup table; otherwise every pixel goes through the vectorized path.
+
+        Args:
+            image (Image): The original image.
+            filter_type (str): 'grayscale', 'sepia' or 'negative'.
+
+        Returns:
+            list[Pixel]: The filtered pixels, in the same order as image.pixels.
+        """
+        colors = [pixel.color for pixel in image.pixels]
+        palette = color_palette(colors)
+        if len(palette) <= PALETTE_MAX_RATIO * len(colors):
+            colors, _ = apply_filter_palette(colors, filter_type, palette)
+        else:
+            colors = apply_filter_batch(colors, filter_type)
+        return [
+            Pixel(row=pixel.row, column=pixel.column, color=color)
+            for pixel, color in zip(image.pixels, colors)
+        ]
+
     def apply_grayscale(self, image):
         """
         Applies a grayscale filter to an image.
@@ -346,22 +403,11 @@ class ImageService:
         Returns:
             Image: The image transformed to grayscale.
         """
-        transformed_pixels = []
-        for pixel in image.pixels:
-            r, g, b = hex_to_rgb(pixel.color)  # Convert HEX to RGB
-            gray = int(
-                0.2989 * r + 0.5870 * g + 0.1140 * b
-            )  # Calculate grayscale value
-            gray_hex = rgb_to_hex(gray, gray, gray)  # Convert grayscale back to HEX
-            transformed_pixels.append(
-                Pixel(row=pixel.row, column=pixel.column, color=gray_hex)
-            )
-
         transformed_image = Image(
             id=None,  # The new ID will be assigned later
             user_id=image.user_id,
             name=f"{image.name}_grayscale",
-            pixels=transformed_pixels,
+            pixels=self._filter_pixels(image, "grayscale"),
         )
         return transformed_image
 
@@ -375,27 +421,11 @@ class ImageService:
         Returns:
             Image: The image transformed to sepia.
         """
-        transformed_pixels = []
-        for pixel in image.pixels:
-            r, g, b = hex_to_rgb(pixel.color)  # Convert HEX to RGB
-
-            # Apply sepia formulas
-            new_r = min(int(0.393 * r + 0.769 * g + 0.189 * b), 255)
-            new_g = min(int(0.349 * r + 0.686 * g + 0.168 * b), 255)
-            new_b = min(int(0.272 * r + 0.534 * g + 0.131 * b), 255)
-
-            sepia_hex = rgb_to_hex(
-                new_r, new_g, new_b
-            )  # Convert sepia result back to HEX
-            transformed_pixels.append(
-                Pixel(row=pixel.row, column=pixel.column, color=sepia_hex)
-            )
-
         transformed_image = Image(
             id=None,  # The new ID will be assigned later
             user_id=image.user_id,
             name=f"{image.name}_sepia",
-            pixels=transformed_pixels,
+            pixels=self._filter_pixels(image, "sepia"),
         )
         return transformed_image
 
@@ -409,28 +439,53 @@ class ImageService:
         Returns:
             Image: The image transformed to negative.
         """
-        transformed_pixels = []
-        for pixel in image.pixels:
-            r, g, b = hex_to_rgb(pixel.color)  # Convert HEX to RGB
-
-            # Apply negative transformation
-            neg_r = 255 - r
-            neg_g = 255 - g
-            neg_b = 255 - b
-
-            negative_hex = rgb_to_hex(neg_r, neg_g, neg_b)  # Convert back to HEX
-            transformed_pixels.append(
-                Pixel(row=pixel.row, column=pixel.column, color=negative_hex)
-            )
-
         transformed_image = Image(
             id=None,  # The new ID will be assigned later
             user_id=image.user_id,
             name=f"{image.name}_negative",
-            pixels=transformed_pixels,
+            pixels=self._filter_pixels(image, "negative"),
         )
         return transformed_image
 
+    def create_transformed_image(self, image_id, filter_type):
+        """
+        Applies a filter to an existing image and stores the result, without rendering it.
+
+        Args:
+            image_id (str): The ID of the image to transform.
+            filter_type (str): The type of filter ('grayscale', 'sepia' or 'negative').
+
+        Returns:
+            Image: The stored transformed image, with its new ID.
+
+        Raises:
+            ValueError: If the image doesn't exist, was already edited, or the filter is unsupported.
+        """
+        # Read only the original image (its pixels load when the filter needs them)
+        original_image = self.get_image(image_id)
+        if not original_image:
+            raise ValueError("The image with the specified ID does not exist.")
+
+        if original_image.edited:
+            raise ValueError("The image has already been edited.")
+
+        # Apply the corresponding filter
+        if filter_type == "grayscale":
+            transformed_image = self.apply_grayscale(original_image)
+        elif filter_type == "sepia":
+            transformed_image = self.apply_sepia(original_image)
+        elif filter_type == "negative":
+            transformed_image = self.apply_negative(original_image)
+        else:
+            raise ValueError("Unsupported filter type.")
+
+        # Update the edited status; the new ID is assigned when it is stored
+        transformed_image.edited = True
+
+        # Write the transformed image to the XML file
+        self.store_image(transformed_image, edited=True)
+        return transformed_image
+
     def transform_image(self, image_id, filter_type):
         """
         Transforms an existing image by applying a filter (grayscale or sepia) and saves it to the XML file.
@@ -443,71 +498,10 @@ class ImageService:
             dict: Contains the status, the new image ID, the original graph, and the transformed graphical representation.
         """
         try:
-            # Load all images from the XML file
-            images = self.get_all_images()
-
-            # Find the original image
-            original_image = next((img for img in images if img.id == image_id), None)
-            if not original_image:
-                raise ValueError("The image with the specified ID does not exist.")
-
-            if original_image.edited:
-                raise ValueError("The image has already been edited.")
-
-            # Apply the corresponding filter
-            if filter_type == "grayscale":
-                transformed_image = self.apply_grayscale(original_image)
-            elif filter_type == "sepia":
-                transformed_image = self.apply_sepia(original_image)
-            elif filter_type == "negative":
-                transformed_image = self.apply_negative(original_image)
-            else:
-                raise ValueError("Unsupported filter type.")
-
-            # Update the edited status and assign a new ID
-            transformed_image.id = self._generate_next_id()
-            transformed_image.edited = True
-
-            # Generate the transformed graphical representation
-            sparse_matrix = SparseMatrix()
-            for pixel in transformed_image.pixels:
-                sparse_matrix.insert(pixel.row, pixel.column, pixel.color)
-
-            transformed_graph_base64 = sparse_matrix.plot()
-
-            # Write the transformed image directly to the XML file
-            tree = ET.parse(self.images_file)
-            root = tree.getroot()
-
-            image_elem = ET.SubElement(
-                root,
-                "imagen",
-                {
-                    "id": escape(transformed_image.id),
-                    "id_usuario": escape(transformed_image.user_id),
-                    "editado": "1",  # Transformed images are always edited
-                },
-            )
-            ET.SubElement(image_elem, "nombre").text = escape(transformed_image.name)
-
-            design_elem = ET.SubElement(image_elem, "diseño")
-            for pixel in transformed_image.pixels:
-                ET.SubElement(
-                    design_elem,
-                    "pixel",
-                    {"fila": str(pixel.row), "col": str(pixel.column)},
-                ).text = escape(pixel.color)
-
-            # Save changes to the XML file
-            self._write_pretty_xml(tree, self.images_file)
-
-            # Save the transformed graph as base64
-            self.save_base64(
-                transformed_image.id,
-                transformed_graph_base64,
-                transformed_image.user_id,
-                edited=True,
-            )
+            transformed_image = self.create_transformed_image(image_id, filter_type)
+
+            # Generate and save the transformed graphical representation
+            transformed_graph_base64 = self.render_image(transformed_image, edited=True)
 
             return {
                 "success": True,
@@ -530,21 +524,15 @@ class ImageService:
             str: The base64 graphical representation of the image.
         """
         try:
-            tree = ET.parse(self.base64_file)
-            root = tree.getroot()
-
-            # Find the image element with the specified ID
-            if edited:
-                image_elem = root.find(f"./imagen[@id='{image_id}' and @editado='0']")
-            else:
-                image_elem = root.find(f"./imagen[@id='{image_id}']")
+            # Find the render of the image with the specified ID
+            base64_data = self.store.get_base64(image_id, original_only=edited)
 
-            if image_elem is None:
+            if base64_data is None:
                 raise ValueError(
                     "Image with the specified ID does not exist or does not match criteria."
                 )
 
-            return image_elem.text
+            return base64_data
 
         except Exception as e:
             raise Exception(f"Error retrieving the image graph: {e}")
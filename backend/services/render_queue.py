@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from storage.file_lock import atomic_write
+
+# <image_id>-<token>, as generated by RenderJob
+_JOB_ID_RE = re.compile(r"^(?P<image_id>.+)-(?P<token>[0-9a-f]{32})$")
+
+
+class RenderJob:
+    """
+    Represents a background render of a stored image.
+
+    Attributes:
+        id (str): Unique identifier of the job, prefixed with the image ID.
+        image_id (str): ID of the image being rendered.
+        state (str): 'queued', 'running', 'done' or 'failed'.
+        graph (str): Base64 graph once the render is done.
+        error (str): Error message if the render failed.
+    """
+
+    def __init__(self, image_id):
+        self.id = f"{image_id}-{uuid.uuid4().hex}"
+        self.image_id = image_id
+        self.state = "queued"
+        self.graph = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "image_id": self.image_id,
+            "state": self.state,
+            "graph": self.graph,
+            "error": self.error,
+        }
+
+
+class RenderQueue:
+    """
+    Background queue that renders stored images with a bounded number of workers.
+
+    Jobs are deduplicated by image ID: submitting an image that already has a
+    queued or running job returns that job instead of rendering it twice.
+
+    The state of the latest job of each image is also saved in a small JSON
+    file until its graph is saved, and kept if the render fails, so any worker
+    can report jobs it doesn't hold in memory.
+
+    Attributes:
+        image_service (ImageService): Service used to render and save the graphs.
+        max_finished_jobs (int): Number of finished jobs kept for status queries.
+        jobs_dir (str): Directory holding the saved job states.
+    """
+
+    def __init__(self, image_service, max_workers, max_finished_jobs=1000):
+        """
+        Initializes the queue and its worker pool.
+
+        Args:
+            image_service (ImageService): Service used to render and save the graphs.
+            max_workers (int): Maximum number of renders running at once.
+            max_finished_jobs (int): Number of finished jobs kept for status queries.
+        """
+        self.image_service = image_service
+        self.max_finished_jobs = max_finished_jobs
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="render"
+        )
+        self.jobs = OrderedDict()  # job id -> RenderJob, oldest first
+        self.active = {}  # image id -> queued or running RenderJob
+        self.lock = threading.Lock()
+
+        self.jobs_dir = os.path.join(image_service.storage_path, "render_jobs")
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    def _state_file(self, image_id):
+        # Image IDs aren't necessarily valid file names
+        name = hashlib.sha1(image_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.jobs_dir, f"{name}.json")
+
+    def _save_state(self, job):
+        with atomic_write(self._state_file(job.image_id), "w", encoding="utf-8") as f:
+            json.dump({"job_id": job.id, "state": job.state, "error": job.error}, f)
+
+    def _load_state(self, image_id):
+        try:
+            with open(self._state_file(image_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def submit(self, image, edited=False):
+        """
+        Queues the render of a stored image.
+
+        Args:
+            image (Image): Image to render. Must already be stored and have an ID.
+            edited (bool): False if the image is original, True if edited.
+
+        Returns:
+            RenderJob: The new job, or the pending job already rendering this image.
+        """
+        with self.lock:
+            job = self.active.get(image.id)
+            if job is not None:
+                return job
+
+            job = RenderJob(image.id)
+            self.jobs[job.id] = job
+            self.active[image.id] = job
+            self._save_state(job)
+
+        self.executor.submit(self._run, job, image, edited)
+        return job
+
+    def _run(self, job, image, edited):
+        job.state = "running"
+        try:
+            self._save_state(job)
+            job.graph = self.image_service.render_image(image, edited=edited)
+            job.state = "done"
+            # The saved graph answers for the job from now on, unless another
+            # worker has queued the image again meanwhile
+            saved = self._load_state(job.image_id)
+            if saved is not None and saved.get("job_id") == job.id:
+                try:
+                    os.remove(self._state_file(job.image_id))
+                except FileNotFoundError:
+                    pass
+        except Exception as e:
+            job.error = str(e)
+            job.state = "failed"
+            try:
+                self._save_state(job)
+            except OSError:
+                pass
+        finally:
+            with self.lock:
+                self.active.pop(image.id, None)
+                self._prune()
+
+    def _prune(self):
+        """Drops the oldest finished jobs beyond max_finished_jobs."""
+        finished = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.state in ("done", "failed")
+        ]
+        for job_id in finished[: max(len(finished) - self.max_finished_jobs, 0)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Returns the status of a job.
+
+        Jobs submitted in another process (or already pruned) are resolved from
+        the image encoded in the job ID: from its saved state while the job is
+        queued or running, or after it failed, and 'done' once its graph is
+        saved. A job whose worker died before finishing stays in its last
+        saved state.
+
+        Args:
+            job_id (str): ID returned by submit().
+
+        Returns:
+            dict: The job status, or None if the job is unknown.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+
+        match = _JOB_ID_RE.match(job_id)
+        if match is None:
+            return None
+        image_id = match.group("image_id")
+
+        saved = self._load_state(image_id)
+        if saved is not None and saved.get("job_id") == job_id:
+            state, error, graph = saved["state"], saved.get("error"), None
+        else:
+            # No saved state: the job finished, or it never existed
+            try:
+                graph = self.image_service.get_base64(image_id)
+            except Exception:
+                return None
+            state, error = "done", None
+        return {
+            "job_id": job_id,
+            "image_id": image_id,
+            "state": state,
+            "graph": graph,
+            "error": error,
+        }
@@ -1,7 +1,13 @@
-import xml.etree.ElementTree as ET
 import os
-from xml.dom import minidom
-from models.user import User
+from config import USER_STORE
+from storage.xml_user_store import XmlUserStore
+from storage.sqlite_store import SqliteUserStore
+from utils.xml_parser import iter_users
+
+USER_STORES = {
+    "xml": XmlUserStore,
+    "sqlite": SqliteUserStore,
+}
 
 
 class UsersService:
@@ -16,61 +22,78 @@ class UsersService:
         project_root = os.path.dirname(os.path.dirname(current_dir))
         self.storage_path = os.path.join(project_root, "database")
         self.storage_path = os.path.abspath(self.storage_path)
-        self.users_file = os.path.join(self.storage_path, "usuarios.xml")
-
-        # Create storage directory if it doesn't exist
-        os.makedirs(self.storage_path, exist_ok=True)
 
-        # Initialize XML files if they don't exist
-        self._initialize_users_file()
+        if USER_STORE not in USER_STORES:
+            raise ValueError(f"Unknown user store: {USER_STORE}")
 
-    def _initialize_users_file(self):
-        """Initialize the users XML file if it doesn't exist."""
-        if not os.path.exists(self.users_file):
-            root = ET.Element("usuarios")
-            tree = ET.ElementTree(root)
-            self._write_pretty_xml(tree)
-
-    def _write_pretty_xml(self, tree):
-        """Write XML with proper formatting."""
-        try:
-            xmlstr = minidom.parseString(ET.tostring(tree.getroot())).toprettyxml(
-                indent="\t"
-            )
-            xmlstr = "\n".join([line for line in xmlstr.splitlines() if line.strip()])
-            with open(self.users_file, "w", encoding="utf-8") as f:
-                f.write(xmlstr)
-        except (ET.ParseError, IOError) as e:
-            raise Exception(f"Error writing XML: {e}")
+        # Create the storage engine (and its files if they don't exist)
+        self.store = USER_STORES[USER_STORE](self.storage_path)
 
     def save_users(self, users):
         """
         Save a list of User objects to the XML file.
         Args:
             users (list[User]): List of User objects to save.
+        Returns:
+            list[str]: IDs of the users saved; existing users are skipped.
         """
         try:
-            self._initialize_users_file()
-            tree = ET.parse(self.users_file)
-            root = tree.getroot()
+            return self.store.save_users(users)
 
-            for user in users:
-                if self._user_exists(user.user_id, root):
-                    continue  # Skip duplicate users
+        except Exception as e:
+            raise Exception(f"Error saving users: {e}")
 
-                user_elem = ET.SubElement(
-                    root, "usuario", {"id": user.user_id, "pwd": user.pwd}
-                )
-                ET.SubElement(user_elem, "NombreCompleto").text = user.full_name
-                ET.SubElement(user_elem, "CorreoElectronico").text = user.email
-                ET.SubElement(user_elem, "NumeroTelefono").text = user.phone_number
-                ET.SubElement(user_elem, "Direccion").text = user.address
-                ET.SubElement(user_elem, "Perfil").text = user.profile_url
+    def import_users(self, source):
+        """
+        Import users from an XML file, validating them as the file is streamed.
 
-            self._write_pretty_xml(tree)
+        Users with invalid data, repeated IDs in the file or IDs that are already
+        registered are rejected; the rest are saved in a single write at the end.
+        Nothing is saved if the XML is malformed.
+        Args:
+            source (str | file): Path or binary file object of the XML file.
+        Returns:
+            dict: "accepted" and "rejected" counts, and "results" with the
+                record number, ID, status and rejection reason of each user.
+        Raises:
+            ValueError: If the XML is malformed.
+        """
+        try:
+            results = []
+            users = []
+            seen = set()
+            for record, (user_id, user, error) in enumerate(iter_users(source), 1):
+                if error is None and user_id in seen:
+                    error = "Duplicate user ID in file"
+                if error is None:
+                    seen.add(user_id)
+                    users.append(user)
+                results.append(
+                    {
+                        "record": record,
+                        "id": user_id,
+                        "status": "rejected" if error else "accepted",
+                        "reason": error,
+                    }
+                )
 
+            saved = set(self.store.save_users(users))
+            for result in results:
+                if result["status"] == "accepted" and result["id"] not in saved:
+                    result["status"] = "rejected"
+                    result["reason"] = "User already exists"
+
+            accepted = sum(result["status"] == "accepted" for result in results)
+            return {
+                "accepted": accepted,
+                "rejected": len(results) - accepted,
+                "results": results,
+            }
+
+        except ValueError:
+            raise
         except Exception as e:
-            raise Exception(f"Error saving users: {e}")
+            raise Exception(f"Error importing users: {e}")
 
     def get_users(self):
         """
@@ -79,23 +102,7 @@ class UsersService:
             list[User]: List of User objects.
         """
         try:
-            tree = ET.parse(self.users_file)
-            root = tree.getroot()
-
-            users = []
-            for user_elem in root.findall("usuario"):
-                user = User(
-                    user_id=user_elem.get("id"),
-                    pwd=user_elem.get("pwd"),
-                    full_name=user_elem.find("NombreCompleto").text or "",
-                    email=user_elem.find("CorreoElectronico").text or "",
-                    phone_number=user_elem.find("NumeroTelefono").text or "",
-                    address=user_elem.find("Direccion").text or "",
-                    profile_url=user_elem.find("Perfil").text or "",
-                )
-                users.append(user)
-
-            return users
+            return self.store.get_users()
 
         except Exception as e:
             raise Exception(f"Error retrieving users: {e}")
@@ -109,22 +116,7 @@ class UsersService:
             User: The user object if found, otherwise None.
         """
         try:
-            tree = ET.parse(self.users_file)
-            root = tree.getroot()
-
-            # Find user by username
-            user_elem = root.find(f"./usuario[@id='{username}']")
-            if user_elem is not None:
-                return User(
-                    user_id=user_elem.get("id"),
-                    pwd=user_elem.get("pwd"),
-                    full_name=user_elem.find("NombreCompleto").text or "",
-                    email=user_elem.find("CorreoElectronico").text or "",
-                    phone_number=user_elem.find("NumeroTelefono").text or "",
-                    address=user_elem.find("Direccion").text or "",
-                    profile_url=user_elem.find("Perfil").text or "",
-                )
-            return None
+            return self.store.get_user(username)
 
         except Exception as e:
             raise Exception(f"Error retrieving user by username: {e}")
@@ -161,27 +153,11 @@ class UsersService:
             bool: True if successful, False if user already exists.
         """
         try:
-            tree = ET.parse(self.users_file)
-            root = tree.getroot()
-
-            if self._user_exists(user.user_id, root):
-                return False
-
-            user_elem = ET.SubElement(
-                root, "usuario", {"id": user.user_id, "pwd": user.pwd}
-            )
-            ET.SubElement(user_elem, "NombreCompleto").text = user.full_name
-            ET.SubElement(user_elem, "CorreoElectronico").text = user.email
-            ET.SubElement(user_elem, "NumeroTelefono").text = user.phone_number
-            ET.SubElement(user_elem, "Direccion").text = user.address
-            ET.SubElement(user_elem, "Perfil").text = user.profile_url
-
-            self._write_pretty_xml(tree)
-            return True
+            return self.store.add_user(user)
 
         except Exception as e:
             raise Exception(f"Error adding user: {e}")
 
-    def _user_exists(self, user_id, root):
+    def _user_exists(self, user_id):
         """Check if a user with the given ID already exists."""
-        return root.find(f"./usuario[@id='{user_id}']") is not None
+        return self.store.user_exists(user_id)
@@ -0,0 +1,172 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+
+
+def id_sort_key(image_id):
+    """
+    Sort key of an image ID: numeric IDs in numeric order ('9999' < '10000'),
+    any other ID after them in text order.
+    """
+    if image_id.isdigit():
+        return (0, int(image_id), "")
+    return (1, 0, image_id)
+
+
+class ImageStore(ABC):
+    """
+    Repository of image designs and their base64 renders.
+
+    Text values (IDs, names, colors and base64 data) are returned the way the
+    XML store has always returned them, so every implementation feeds the
+    services and the XML export with the same data.
+    """
+
+    @abstractmethod
+    def add_image(self, image, edited=False):
+        """
+        Stores the design of an image.
+
+        Args:
+            image (Image): Image to store. Must have an ID.
+            edited (bool): False if the image is original, True if edited.
+
+        Returns:
+            bool: True if the image was stored, False if an image with the same ID already exists.
+        """
+
+    @abstractmethod
+    def image_exists(self, image_id):
+        """Checks if an image with the given ID already exists."""
+
+    @abstractmethod
+    def get_image_ids(self):
+        """Returns the IDs of all stored images, in storage order."""
+
+    @abstractmethod
+    def get_max_id(self):
+        """Returns the highest numeric image ID, 0 if there are no images."""
+
+    def get_image(self, image_id):
+        """
+        Returns the image with the given ID, or None.
+
+        Stores override this to go straight to the record through an index, so
+        the cost depends only on the size of that image.
+        """
+        return next(
+            (image for image in self.iter_images() if image.id == image_id), None
+        )
+
+    def iter_images(self, user_id=None):
+        """
+        Yields the stored images, or only those of a user, in storage order.
+
+        Stores override this to read one record at a time, so callers can stop
+        early and memory doesn't grow with the number of images.
+        """
+        yield from self.get_images(user_id)
+
+    @abstractmethod
+    def get_images(self, user_id=None):
+        """
+        Returns all stored images, or only those of a user, in storage order.
+
+        Args:
+            user_id (str, optional): ID of the user to filter by.
+
+        Returns:
+            list[Image]: The images.
+        """
+
+    @abstractmethod
+    def save_base64(self, image_id, base64_data, user_id, edited=False):
+        """Saves or replaces the base64 render of an image."""
+
+    @abstractmethod
+    def get_base64(self, image_id, original_only=False):
+        """
+        Returns the base64 render of an image, or None if there is none.
+
+        Args:
+            image_id (str): The ID of the image.
+            original_only (bool): If True, only match original images (editado="0").
+        """
+
+    @abstractmethod
+    def get_gallery_images(self):
+        """Returns id, id_usuario, editado and base64 of every stored render."""
+
+    @abstractmethod
+    def get_render_metadata(self):
+        """Returns id, id_usuario and editado of every stored render, without reading the renders."""
+
+    def get_gallery_page(self, limit=None, after=None, user_id=None, with_base64=True):
+        """
+        Returns a window of the stored renders, ordered by image ID.
+
+        The window is selected from the render metadata; only the renders in
+        the window are read.
+
+        Args:
+            limit (int, optional): Maximum number of entries, all of them if None.
+            after (str, optional): Return only entries whose ID sorts after this one.
+            user_id (str, optional): Return only the entries of this user.
+            with_base64 (bool): If False, leave the renders out of the entries.
+
+        Returns:
+            tuple[list[dict], str | None]: The entries, and the ID to pass as
+            `after` to get the next page (None if this is the last page).
+        """
+        entries = self.get_render_metadata()
+        if user_id is not None:
+            entries = [entry for entry in entries if entry["id_usuario"] == user_id]
+        entries.sort(key=lambda entry: id_sort_key(entry["id"]))
+
+        start = 0
+        if after is not None:
+            keys = [id_sort_key(entry["id"]) for entry in entries]
+            start = bisect_right(keys, id_sort_key(after))
+        end = len(entries) if limit is None else start + limit
+        page = entries[start:end]
+
+        if with_base64:
+            for entry in page:
+                entry["base64"] = self.get_base64(entry["id"])
+        next_after = page[-1]["id"] if page and end < len(entries) else None
+        return page, next_after
+
+
+class UserStore(ABC):
+    """
+    Repository of registered users.
+    """
+
+    @abstractmethod
+    def add_user(self, user):
+        """
+        Stores a single user.
+
+        Returns:
+            bool: True if successful, False if the user already exists.
+        """
+
+    @abstractmethod
+    def save_users(self, users):
+        """
+        Stores a list of users, skipping those that already exist, in one write.
+
+        Returns:
+            list[str]: IDs of the users actually stored.
+        """
+
+    @abstractmethod
+    def user_exists(self, user_id):
+        """Checks if a user with the given ID already exists."""
+
+    @abstractmethod
+    def get_user(self, user_id):
+        """Returns the user with the given ID, or None."""
+
+    @abstractmethod
+    def get_users(self):
+        """Returns all users, in storage order."""
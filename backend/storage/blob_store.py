@@ -0,0 +1,66 @@
+import base64
+import gzip
+import hashlib
+import os
+from storage.file_lock import atomic_write
+
+
+class BlobStore:
+    """
+    Content-addressed store of rendered images.
+
+    Each render is decoded from base64, gzip-compressed and saved once as
+    `<sha256[:2]>/<sha256>.svgz`, where sha256 is the hash of the rendered
+    bytes; that hash is the reference kept in the metadata. Identical renders
+    share one file, and listing the metadata never touches the render bytes.
+
+    Attributes:
+        directory (str): Directory holding the blob files.
+    """
+
+    def __init__(self, directory):
+        """
+        Initializes the store.
+
+        Args:
+            directory (str): Directory holding the blob files.
+        """
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, ref):
+        return os.path.join(self.directory, ref[:2], f"{ref}.svgz")
+
+    def put(self, base64_data):
+        """
+        Stores a base64 render, unless an identical one is already stored.
+
+        Args:
+            base64_data (str): The base64 representation of the render.
+
+        Returns:
+            str: The reference of the render.
+        """
+        data = base64.b64decode(base64_data)
+        ref = hashlib.sha256(data).hexdigest()
+        path = self._path(ref)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written next to its final path and renamed, so a blob is never half-written
+            with atomic_write(path) as f:
+                f.write(gzip.compress(data, mtime=0))
+        return ref
+
+    def get(self, ref):
+        """
+        Returns the base64 render of a reference.
+
+        Args:
+            ref (str): Reference returned by put().
+
+        Returns:
+            str: The base64 representation of the render.
+        """
+        with open(self._path(ref), "rb") as f:
+            data = gzip.decompress(f.read())
+        return base64.b64encode(data).decode("utf-8")
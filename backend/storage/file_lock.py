@@ -0,0 +1,87 @@
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# flock() locks are per open file, so threads of one process exclude each other
+# too; msvcrt locks are per process, so threads also take a process-wide lock.
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path):
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """
+    Holds an advisory lock on a lock file for the duration of a `with` block.
+
+    The lock is taken on a separate file (created if needed) so the guarded data
+    file itself can be replaced while the lock is held. Shared locks allow other
+    shared holders; exclusive locks allow nobody else. On Windows every lock is
+    exclusive.
+
+    Args:
+        path (str): Path of the lock file, usually `<data file>.lock`.
+        shared (bool): Take a shared (read) lock instead of an exclusive one.
+    """
+    path = os.path.abspath(path)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            with _thread_lock(path):
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def atomic_write(path, mode="wb", encoding=None):
+    """
+    Writes a file atomically: yields a temporary file next to `path`, then
+    fsyncs it and renames it over `path`.
+
+    Readers see either the old or the new file, never a partial one. If the
+    `with` block raises, the temporary file is removed and `path` is untouched.
+
+    Args:
+        path (str): Path of the file to write.
+        mode (str): "wb" for bytes, "w" for text.
+        encoding (str, optional): Encoding of text mode.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if fcntl is not None:  # Persist the rename itself
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,71 @@
+import os
+from storage.file_lock import file_lock
+
+
+class IdAllocator:
+    """
+    Persistent counter that hands out image IDs.
+
+    The last allocated number is kept in a small counter file. Each allocation
+    reads it, increments it and writes it back under an exclusive file lock, so
+    workers in different processes never receive the same ID and no allocation
+    has to scan the stored images.
+
+    IDs are zero-padded to four digits ('0001', '0002', ...) and simply grow
+    wider past '9999'; stores order them numerically (see id_sort_key).
+
+    Attributes:
+        counter_file (str): Path to the counter file.
+        lock_file (str): Path to the lock file guarding the counter.
+    """
+
+    def __init__(self, counter_file, seed):
+        """
+        Initializes the allocator.
+
+        Args:
+            counter_file (str): Path to the counter file.
+            seed (callable): Returns the highest ID already in use; called when the
+                counter file is missing or unreadable, and by sync().
+        """
+        self.counter_file = counter_file
+        self.lock_file = f"{counter_file}.lock"
+        self.seed = seed
+
+    def _read(self):
+        try:
+            with open(self.counter_file, "r", encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, value):
+        with open(self.counter_file, "w", encoding="utf-8") as f:
+            f.write(str(value))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def allocate(self):
+        """
+        Atomically reserves the next ID.
+
+        Returns:
+            str: The new ID in format '0001', '0002', etc.
+        """
+        with file_lock(self.lock_file):
+            last = self._read()
+            if last is None:
+                last = self.seed()
+            self._write(last + 1)
+        return f"{last + 1:04d}"
+
+    def sync(self):
+        """
+        Moves the counter forward to the highest ID in use, if it is behind
+        (for instance after images were imported by another tool).
+        """
+        with file_lock(self.lock_file):
+            last = self._read()
+            highest = self.seed()
+            if last is None or last < highest:
+                self._write(highest)
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from storage.file_lock import atomic_write, file_lock
+
+
+class ImageStatistics:
+    """
+    Persistent counters of the stored images, per user and in total.
+
+    The counters are kept in a small JSON file:
+
+        {"total_images": 3, "total_edited": 1,
+         "users": {"IPC-001": {"images": 2, "edited": 1}, ...}}
+
+    Images are stored and counted within recording(), which holds an exclusive
+    file lock across both, so a recount (which takes the same lock) sees every
+    stored image exactly once. The file is replaced atomically, so reading the
+    statistics needs no lock and never touches the image store. The last
+    statistics read are kept in memory until the file changes. Users appear in
+    the order their first image was stored.
+
+    If the file is missing or unreadable, the counters are rebuilt under the
+    lock by counting the stored images; rebuild() does the same on demand, for
+    instance after images were imported by another tool.
+
+    Attributes:
+        stats_file (str): Path to the statistics file.
+        lock_file (str): Path to the lock file guarding the statistics.
+    """
+
+    def __init__(self, stats_file, images):
+        """
+        Initializes the statistics.
+
+        Args:
+            stats_file (str): Path to the statistics file.
+            images (callable): Returns an iterable of the stored images; used to
+                rebuild the counters.
+        """
+        self.stats_file = stats_file
+        self.lock_file = f"{stats_file}.lock"
+        self.images = images
+        self.cached = None
+        self.stamp = None
+        self.lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.stats_file, "r", encoding="utf-8") as f:
+                stats = json.load(f)
+            if isinstance(stats.get("users"), dict):
+                return stats
+        except (OSError, ValueError, AttributeError):
+            pass
+        return None
+
+    def _write(self, stats):
+        with atomic_write(self.stats_file, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+
+    def _add(self, stats, user_id, edited):
+        user_stats = stats["users"].setdefault(user_id, {"images": 0, "edited": 0})
+        user_stats["images"] += 1
+        stats["total_images"] += 1
+        if edited:
+            user_stats["edited"] += 1
+            stats["total_edited"] += 1
+
+    def _count(self):
+        stats = {"total_images": 0, "total_edited": 0, "users": {}}
+        for image in self.images():
+            self._add(stats, image.user_id, image.edited)
+        return stats
+
+    @contextmanager
+    def recording(self):
+        """
+        Holds the statistics lock while images are stored, and counts them.
+
+        If the file is missing or unreadable, the store is counted first,
+        before the block stores anything. The counters are written when the
+        block ends, if it recorded any image.
+
+        Yields:
+            callable: record(user_id, edited=False), to call for each image
+                stored within the block.
+        """
+        with file_lock(self.lock_file):
+            stats = self._read()
+            if stats is None:
+                stats = self._count()
+                self._write(stats)
+            recorded = []
+
+            def record(user_id, edited=False):
+                self._add(stats, user_id, edited)
+                recorded.append(user_id)
+
+            yield record
+            if recorded:
+                self._write(stats)
+
+    def rebuild(self):
+        """
+        Recounts the stored images and replaces the counters.
+
+        Returns:
+            dict: The rebuilt statistics.
+        """
+        with file_lock(self.lock_file):
+            stats = self._count()
+            self._write(stats)
+        return stats
+
+    def get(self):
+        """
+        Returns the statistics, rebuilding them if the file is missing or unreadable.
+
+        Returns:
+            dict: total_images, total_edited and, per user ID, images and edited.
+        """
+        with self.lock:
+            try:
+                stat = os.stat(self.stats_file)
+                stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stamp = None
+            if stamp is None or stamp != self.stamp:
+                # Read after the stamp, so the cache is never older than it
+                self.cached = self._read()
+                self.stamp = stamp if self.cached is not None else None
+            if self.cached is not None:
+                return self.cached
+        return self.rebuild()
@@ -0,0 +1,442 @@
+import os
+import re
+import threading
+from xml.etree import ElementTree as ET
+from storage.base import ImageStore
+from storage.blob_store import BlobStore
+from storage.file_lock import atomic_write, file_lock
+from storage.xml_image_store import (
+    gallery_entry,
+    image_from_element,
+    image_to_element,
+    render_data,
+    render_metadata,
+    render_to_element,
+    write_pretty_xml,
+)
+
+_SEGMENT_RE = re.compile(r"^(?P<prefix>\w+)-(?P<number>\d{6})\.log$")
+_OPEN_TAG_RE = re.compile(rb"^<imagen\b[^>]*?(?=/?>)")
+
+
+def _record_bytes(elem):
+    """
+    Serializes an element as a single log line.
+
+    Line breaks inside text or attributes are written as character references
+    so every record stays on one line.
+    """
+    line = ET.tostring(elem, encoding="unicode")
+    line = line.replace("\r", "&#13;").replace("\n", "&#10;")
+    return line.encode("utf-8") + b"\n"
+
+
+def _record_attributes(line):
+    """
+    Parses only the attributes of the opening <imagen> tag of a log line.
+    """
+    match = _OPEN_TAG_RE.match(line)
+    if match is None:
+        raise ValueError("Corrupt log record.")
+    return dict(ET.fromstring(match.group(0) + b"/>").attrib)
+
+
+class SegmentLog:
+    """
+    Append-only log of <imagen> records split into numbered segment files.
+
+    Each record is one line; an in-memory index maps the record ID to the
+    segment, byte offset and length of its latest version, plus the attributes
+    of its opening tag. Appends cost O(size of the record), and refresh() picks
+    up records appended by other processes by reading only the new bytes.
+
+    Attributes:
+        directory (str): Directory holding the segment files.
+        prefix (str): File name prefix of the segments.
+        max_segment_bytes (int): Size after which a new segment is started.
+        lock_file (str): Lock file serializing appends from all processes.
+        index (dict): Record ID -> (segment number, offset, length, attributes).
+        by_user (dict): User ID -> list of record IDs, in order of first append.
+    """
+
+    def __init__(self, directory, prefix, max_segment_bytes):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_segment_bytes = max_segment_bytes
+        self.lock_file = os.path.join(directory, f"{prefix}.lock")
+        self.index = {}
+        self.by_user = {}
+        self.segments = []  # Segment numbers, oldest first
+        self.loaded = {}  # Segment number -> bytes already replayed into the index
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.refresh()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"{self.prefix}-{segment:06d}.log")
+
+    def refresh(self):
+        """
+        Replays records appended since the last refresh, including new segments.
+        """
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_RE.match(name)
+            if match and match.group("prefix") == self.prefix:
+                segment = int(match.group("number"))
+                if segment not in self.loaded:
+                    self.loaded[segment] = 0
+        self.segments = sorted(self.loaded)
+
+        for segment in self.segments:
+            path = self._segment_path(segment)
+            if os.path.exists(path) and os.path.getsize(path) > self.loaded[segment]:
+                self._load_segment(segment)
+
+    def _load_segment(self, segment):
+        """Replays the unread part of a segment; later records replace earlier ones."""
+        offset = self.loaded[segment]
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Record still being written (or torn), read it next time
+                attributes = _record_attributes(line)
+                self._index((segment, offset, len(line), attributes))
+                offset += len(line)
+        self.loaded[segment] = offset
+
+    def _index(self, entry):
+        attributes = entry[3]
+        record_id = attributes["id"]
+        previous = self.index.get(record_id)
+        if previous is None:
+            self.by_user.setdefault(attributes["id_usuario"], []).append(record_id)
+        elif previous[3]["id_usuario"] != attributes["id_usuario"]:
+            self.by_user[previous[3]["id_usuario"]].remove(record_id)
+            self.by_user.setdefault(attributes["id_usuario"], []).append(record_id)
+        self.index[record_id] = entry
+
+    def append(self, elem):
+        """
+        Appends a record to the active segment, starting a new segment if the
+        active one is full.
+
+        Callers hold the log's file lock and have just refreshed, so the active
+        segment is the newest one on disk, whichever process started it.
+
+        Returns:
+            bool: True if the active segment was sealed and a new one started.
+        """
+        line = _record_bytes(elem)
+        segment = self.segments[-1] if self.segments else 1
+        sealed = False
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_segment_bytes:
+            segment += 1
+            sealed = True
+        if segment not in self.loaded:
+            self.segments.append(segment)
+            self.loaded[segment] = 0
+
+        with open(self._segment_path(segment), "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            end = f.tell()  # In append mode this is the end of our own record
+
+        self._index((segment, end - len(line), len(line), dict(elem.attrib)))
+
+        return sealed
+
+    def read(self, record_id):
+        """
+        Returns the latest record of an ID as an element, or None.
+        """
+        entry = self.index.get(record_id)
+        if entry is None:
+            return None
+        segment, offset, length, _ = entry
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return ET.fromstring(f.read(length))
+
+    def attributes(self, record_id):
+        """
+        Returns the attributes of the latest record of an ID without reading it, or None.
+        """
+        entry = self.index.get(record_id)
+        return entry[3] if entry is not None else None
+
+    def ids(self, user_id=None):
+        """Returns the record IDs, or only those of a user, in order of first append."""
+        if user_id is None:
+            return list(self.index)
+        return list(self.by_user.get(user_id, ()))
+
+
+class LogImageStore(ImageStore):
+    """
+    Log-structured image store: designs and renders are appended to segment logs.
+
+    Writes cost O(size of the new record) instead of rewriting imagenes.xml and
+    imagenes_base64.xml; renders themselves go to a BlobStore and the log only
+    keeps their reference. The canonical files are regenerated by compaction,
+    which runs in the background whenever a segment is sealed, or on demand
+    (`python -m storage.migrate --compact-log`); in between, imagenes.xml and
+    imagenes_base64.xml lag behind the logs, which are the source of truth.
+
+    Attributes:
+        storage_path (str): Path to the directory where the data is stored.
+        images_file (str): Canonical images XML file, regenerated by compaction.
+        base64_file (str): Canonical base64 renders XML file, regenerated by compaction.
+        designs (SegmentLog): Log of image designs.
+        renders (SegmentLog): Log of render references.
+        blobs (BlobStore): Content-addressed store of the rendered images.
+    """
+
+    def __init__(self, storage_path, max_segment_bytes=64 * 1024 * 1024):
+        """
+        Initializes the store, replaying the logs into their indexes.
+
+        On first use, existing imagenes.xml and imagenes_base64.xml records are
+        imported into the logs (see _import_existing).
+
+        Args:
+            storage_path (str): Path to the directory where the data is stored.
+            max_segment_bytes (int): Size after which a new segment is started.
+        """
+        self.storage_path = storage_path
+        self.images_file = os.path.join(self.storage_path, "imagenes.xml")
+        self.base64_file = os.path.join(self.storage_path, "imagenes_base64.xml")
+        log_path = os.path.join(self.storage_path, "imagenes_log")
+        self.imported_file = os.path.join(log_path, "imported")
+
+        self.blobs = BlobStore(os.path.join(self.storage_path, "renders"))
+        self.designs = SegmentLog(log_path, "designs", max_segment_bytes)
+        self.renders = SegmentLog(log_path, "renders", max_segment_bytes)
+        self.lock = threading.Lock()
+        self.compaction = None
+
+        if not os.path.exists(self.imported_file) and self._import_existing():
+            self.externalize_renders()
+
+    def _import_existing(self):
+        """
+        Imports the records of imagenes.xml and imagenes_base64.xml into the logs, once.
+
+        The import runs under the file locks of both logs, so only one worker
+        performs it, and is marked complete by the `imported` sentinel file,
+        written after the last record. Records whose ID is already in a log are
+        skipped, so an import interrupted by a crash is resumed, not duplicated,
+        by the next start.
+
+        Returns:
+            bool: True if this call performed the import.
+        """
+        with self.lock, file_lock(self.designs.lock_file), file_lock(
+            self.renders.lock_file
+        ):
+            if os.path.exists(self.imported_file):
+                return False  # Another worker finished it
+            self._import_xml(self.images_file, self.designs)
+            self._import_xml(self.base64_file, self.renders)
+            with atomic_write(self.imported_file) as f:
+                f.write(b"1")
+            return True
+
+    def _import_xml(self, file_path, log):
+        """Appends the <imagen> records of an XML file missing from a log."""
+        if not os.path.exists(file_path):
+            return
+        log.refresh()
+        for elem in ET.parse(file_path).getroot().findall("imagen"):
+            if elem.get("id") in log.index:
+                continue  # Imported before an interrupted import, or newer
+            for child in elem.iter():  # Drop the pretty-print whitespace
+                if child.text and not child.text.strip():
+                    child.text = None
+                child.tail = None
+            log.append(elem)
+
+    def _append(self, log, elem, unique=False):
+        """
+        Appends a record to a log, compacting in the background if a segment was sealed.
+
+        Returns:
+            bool: False if unique is set and the ID already exists, True otherwise.
+        """
+        with self.lock, file_lock(log.lock_file):
+            log.refresh()
+            if unique and elem.get("id") in log.index:
+                return False
+            sealed = log.append(elem)
+        if sealed:
+            self.compact_in_background()
+        return True
+
+    def _refresh(self, log):
+        """Picks up records appended by other processes."""
+        with self.lock:
+            log.refresh()
+
+    def add_image(self, image, edited=False):
+        """
+        Appends the design of an image to the log.
+
+        Returns:
+            bool: True if the image was stored, False if an image with the same ID already exists.
+        """
+        return self._append(
+            self.designs, image_to_element(image, edited), unique=True
+        )
+
+    def image_exists(self, image_id):
+        """
+        Checks if an image with the given ID already exists.
+        """
+        self._refresh(self.designs)
+        return image_id in self.designs.index
+
+    def get_image_ids(self):
+        """
+        Returns the IDs of all stored images.
+        """
+        self._refresh(self.designs)
+        return self.designs.ids()
+
+    def get_max_id(self):
+        """
+        Returns the highest numeric image ID, 0 if there are no images.
+        """
+        self._refresh(self.designs)
+        return max(
+            (int(image_id) for image_id in self.designs.ids() if image_id.isdigit()),
+            default=0,
+        )
+
+    def get_image(self, image_id):
+        """
+        Returns the image with the given ID, reading only its own record, or None.
+        """
+        self._refresh(self.designs)
+        image_elem = self.designs.read(image_id)
+        return image_from_element(image_elem) if image_elem is not None else None
+
+    def iter_images(self, user_id=None):
+        """
+        Yields the stored images, or only those of a user, in storage order,
+        reading one record at a time.
+        """
+        self._refresh(self.designs)
+        for image_id in self.designs.ids(user_id):
+            yield image_from_element(self.designs.read(image_id))
+
+    def get_images(self, user_id=None):
+        """
+        Returns all stored images, or only those of a user, in storage order.
+        """
+        return list(self.iter_images(user_id))
+
+    def save_base64(self, image_id, base64_data, user_id, edited=False):
+        """
+        Stores the render of an image in the blob store and appends its reference;
+        it replaces any earlier render of the same ID.
+        """
+        blob_ref = self.blobs.put(base64_data)
+        self._append(
+            self.renders, render_to_element(image_id, blob_ref, user_id, edited)
+        )
+
+    def get_base64(self, image_id, original_only=False):
+        """
+        Returns the base64 render of an image, or None if there is none.
+        """
+        self._refresh(self.renders)
+        attributes = self.renders.attributes(image_id)
+        if attributes is None:
+            return None
+        if original_only and attributes.get("editado") != "0":
+            return None
+        if attributes.get("blob"):
+            return self.blobs.get(attributes["blob"])
+        return render_data(self.renders.read(image_id), self.blobs)
+
+    def get_gallery_images(self):
+        """
+        Returns id, id_usuario, editado and base64 of every stored render.
+        """
+        self._refresh(self.renders)
+        return [
+            gallery_entry(self.renders.read(image_id), self.blobs)
+            for image_id in self.renders.ids()
+        ]
+
+    def get_render_metadata(self):
+        """
+        Returns id, id_usuario and editado of every stored render, from the log index alone.
+        """
+        self._refresh(self.renders)
+        return [
+            render_metadata(ET.Element("imagen", self.renders.attributes(image_id)))
+            for image_id in self.renders.ids()
+        ]
+
+    def externalize_renders(self):
+        """
+        Moves the base64 renders held inline in the renders log to the blob store,
+        appending a reference record for each of them.
+
+        Returns:
+            int: Number of renders moved.
+        """
+        self._refresh(self.renders)
+        moved = 0
+        for image_id in self.renders.ids():
+            if self.renders.attributes(image_id).get("blob"):
+                continue
+            render_elem = self.renders.read(image_id)
+            if not render_elem.text:
+                continue
+            render_elem.set("blob", self.blobs.put(render_elem.text.strip()))
+            render_elem.text = None
+            self._append(self.renders, render_elem)
+            moved += 1
+        return moved
+
+    def compact(self):
+        """
+        Regenerates the canonical imagenes.xml and imagenes_base64.xml from the logs.
+
+        Runs in the background when a segment is sealed; run it on demand with
+        `python -m storage.migrate --compact-log`.
+
+        The files are replaced atomically (see write_pretty_xml), so readers
+        never see a half-written export.
+        """
+        with self.lock:
+            self.designs.refresh()
+            self.renders.refresh()
+            design_ids = self.designs.ids()
+            render_ids = self.renders.ids()
+
+        for file_path, root_tag, log, ids in (
+            (self.images_file, "imagenes", self.designs, design_ids),
+            (self.base64_file, "imagenes_base64", self.renders, render_ids),
+        ):
+            root = ET.Element(root_tag)
+            for record_id in ids:
+                root.append(log.read(record_id))
+            write_pretty_xml(ET.ElementTree(root), file_path)
+
+    def compact_in_background(self):
+        """
+        Starts a compaction in a background thread unless one is already running.
+        """
+        with self.lock:
+            if self.compaction is not None and self.compaction.is_alive():
+                return self.compaction
+            self.compaction = threading.Thread(
+                target=self.compact, name="image-log-compaction", daemon=True
+            )
+            self.compaction.start()
+            return self.compaction
@@ -0,0 +1,161 @@
+"""
+Copies users, image designs and renders between storage engines.
+
+Run from the backend directory, e.g. to move an XML database to SQLite:
+
+    python -m storage.migrate --from xml --to sqlite
+
+and back:
+
+    python -m storage.migrate --from sqlite --to xml
+
+Records that already exist in the target are skipped (renders are replaced),
+so the command can be run again after a partial copy.
+
+Databases written before renders moved to the blob store keep the base64
+renders inline; move them out once with:
+
+    python -m storage.migrate --externalize-renders xml
+
+The log engine only rewrites imagenes.xml and imagenes_base64.xml when a log
+segment fills up; bring them up to date with:
+
+    python -m storage.migrate --compact-log
+"""
+
+import argparse
+import os
+from xml.sax.saxutils import unescape
+from models.image import Image
+from models.pixel import Pixel
+from storage.log_image_store import LogImageStore
+from services.image_service import IMAGE_STORES  # Same engines as the services
+from services.user_service import USER_STORES
+
+
+def _unescaped(image):
+    """
+    Returns a copy of a stored image with its text values unescaped.
+
+    Image stores escape text values on write and return them escaped, so the
+    values read from one store are unescaped before they are written to another.
+    """
+    copy = Image(
+        id=unescape(image.id),
+        user_id=unescape(image.user_id),
+        name=unescape(image.name),
+        pixels=[
+            Pixel(row=pixel.row, column=pixel.column, color=unescape(pixel.color))
+            for pixel in image.pixels
+        ],
+    )
+    copy.edited = image.edited
+    return copy
+
+
+def copy_images(source, target):
+    """
+    Copies every image design and render from one image store to another.
+
+    Args:
+        source (ImageStore): Store to read from.
+        target (ImageStore): Store to write to.
+
+    Returns:
+        tuple[int, int]: Number of designs copied and number of renders copied.
+    """
+    designs = 0
+    for image in source.get_images():
+        image = _unescaped(image)
+        if target.add_image(image, image.edited):
+            designs += 1
+
+    renders = 0
+    for entry in source.get_gallery_images():
+        target.save_base64(
+            unescape(entry["id"]),
+            unescape(entry["base64"] or ""),
+            unescape(entry["id_usuario"]),
+            entry["editado"] == "1",
+        )
+        renders += 1
+
+    return designs, renders
+
+
+def copy_users(source, target):
+    """
+    Copies every user from one user store to another.
+
+    Args:
+        source (UserStore): Store to read from.
+        target (UserStore): Store to write to.
+
+    Returns:
+        int: Number of users in the source.
+    """
+    users = source.get_users()
+    target.save_users(users)
+    return len(users)
+
+
+def main(argv=None):
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--from", dest="source", choices=IMAGE_STORES)
+    parser.add_argument("--to", dest="target", choices=IMAGE_STORES)
+    parser.add_argument(
+        "--externalize-renders",
+        choices=("xml", "log"),
+        help="Move the inline base64 renders of an engine to the blob store",
+    )
+    parser.add_argument(
+        "--compact-log",
+        action="store_true",
+        help="Regenerate imagenes.xml and imagenes_base64.xml from the log engine",
+    )
+    parser.add_argument(
+        "--images-path",
+        default=os.path.abspath("database"),
+        help="Directory of the image data (default: ./database, as ImageService)",
+    )
+    parser.add_argument(
+        "--users-path",
+        default=os.path.join(os.path.dirname(backend_dir), "database"),
+        help="Directory of the user data (default: <project>/database, as UsersService)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.externalize_renders:
+        moved = IMAGE_STORES[args.externalize_renders](
+            args.images_path
+        ).externalize_renders()
+        print(f"Renders: {moved} renders moved to the blob store")
+        return
+
+    if args.compact_log:
+        LogImageStore(args.images_path).compact()
+        print("Log compacted to imagenes.xml and imagenes_base64.xml")
+        return
+
+    if not args.source or not args.target:
+        parser.error("--from and --to are required")
+    if args.source == args.target:
+        parser.error("--from and --to must be different engines")
+
+    designs, renders = copy_images(
+        IMAGE_STORES[args.source](args.images_path),
+        IMAGE_STORES[args.target](args.images_path),
+    )
+    print(f"Images: {designs} designs and {renders} renders copied")
+
+    if args.source in USER_STORES and args.target in USER_STORES:
+        users = copy_users(
+            USER_STORES[args.source](args.users_path),
+            USER_STORES[args.target](args.users_path),
+        )
+        print(f"Users: {users} users copied")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+import json
+import os
+import sqlite3
+import threading
+from xml.sax.saxutils import escape
+from models.image import Image
+from models.pixel import Pixel
+from models.user import User
+from storage.base import ImageStore, UserStore
+
+DATABASE_NAME = "ipcart.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS imagenes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    id_usuario TEXT NOT NULL,
+    editado INTEGER NOT NULL,
+    nombre TEXT NOT NULL,
+    pixeles TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS imagenes_usuario ON imagenes (id_usuario, seq);
+CREATE INDEX IF NOT EXISTS imagenes_editado ON imagenes (editado);
+
+CREATE TABLE IF NOT EXISTS imagenes_base64 (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    id_usuario TEXT NOT NULL,
+    editado INTEGER NOT NULL,
+    base64 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS imagenes_base64_usuario ON imagenes_base64 (id_usuario);
+CREATE INDEX IF NOT EXISTS imagenes_base64_editado ON imagenes_base64 (editado);
+-- Gallery pages: numeric IDs in numeric order, then any other ID in text order
+CREATE INDEX IF NOT EXISTS imagenes_base64_numero ON imagenes_base64
+    (CAST(id AS INTEGER)) WHERE id <> '' AND id NOT GLOB '*[^0-9]*';
+CREATE INDEX IF NOT EXISTS imagenes_base64_texto ON imagenes_base64
+    (id) WHERE id = '' OR id GLOB '*[^0-9]*';
+CREATE INDEX IF NOT EXISTS imagenes_base64_usuario_numero ON imagenes_base64
+    (id_usuario, CAST(id AS INTEGER)) WHERE id <> '' AND id NOT GLOB '*[^0-9]*';
+CREATE INDEX IF NOT EXISTS imagenes_base64_usuario_texto ON imagenes_base64
+    (id_usuario, id) WHERE id = '' OR id GLOB '*[^0-9]*';
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    pwd TEXT NOT NULL,
+    nombre_completo TEXT NOT NULL,
+    correo_electronico TEXT NOT NULL,
+    numero_telefono TEXT NOT NULL,
+    direccion TEXT NOT NULL,
+    perfil TEXT NOT NULL
+);
+-- Users are only looked up by ID; drop the email index of older databases
+DROP INDEX IF EXISTS usuarios_correo;
+"""
+
+
+class SqliteDatabase:
+    """
+    SQLite database file shared by the SQLite stores.
+
+    Each thread gets its own connection. The database runs in WAL mode, so
+    readers don't block the writer and several processes can share the file.
+
+    Attributes:
+        path (str): Path to the database file.
+    """
+
+    def __init__(self, storage_path):
+        """
+        Opens (and creates if needed) the database in a storage directory.
+
+        Args:
+            storage_path (str): Path to the directory where the database is stored.
+        """
+        os.makedirs(storage_path, exist_ok=True)
+        self.path = os.path.join(storage_path, DATABASE_NAME)
+        self.local = threading.local()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        """
+        Returns the connection of the calling thread, opening it on first use.
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+
+class SqliteImageStore(ImageStore):
+    """
+    Stores image designs and renders in an SQLite database.
+
+    Designs live in the `imagenes` table with their pixels as a JSON array of
+    [fila, col, color] in a single column; renders live in `imagenes_base64`.
+    Both are indexed by image ID, user ID and editado, and keep the storage
+    order of the XML files through their `seq` column.
+
+    Attributes:
+        storage_path (str): Path to the directory where the database is stored.
+        database (SqliteDatabase): The database.
+    """
+
+    IMAGE_QUERY = (
+        "SELECT id, id_usuario, editado, nombre, pixeles,"
+        " json_array_length(pixeles) FROM imagenes"
+    )
+
+    def __init__(self, storage_path):
+        """
+        Initializes the store and ensures the database exists.
+
+        Args:
+            storage_path (str): Path to the directory where the database is stored.
+        """
+        self.storage_path = storage_path
+        self.database = SqliteDatabase(storage_path)
+
+    def add_image(self, image, edited=False):
+        """
+        Inserts the design of an image.
+
+        Returns:
+            bool: True if the image was stored, False if an image with the same ID already exists.
+        """
+        # Values are escaped like the XML store does, so both return the same text
+        pixels = [
+            [pixel.row, pixel.column, escape(pixel.color)] for pixel in image.pixels
+        ]
+        with self.database.connection() as connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO imagenes"
+                " (id, id_usuario, editado, nombre, pixeles) VALUES (?, ?, ?, ?, ?)",
+                (
+                    escape(image.id),
+                    escape(image.user_id),
+                    1 if edited else 0,
+                    escape(image.name),
+                    json.dumps(pixels, separators=(",", ":")),
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def image_exists(self, image_id):
+        """
+        Checks if an image with the given ID already exists.
+        """
+        row = (
+            self.database.connection()
+            .execute("SELECT 1 FROM imagenes WHERE id = ?", (image_id,))
+            .fetchone()
+        )
+        return row is not None
+
+    def get_image_ids(self):
+        """
+        Returns the IDs of all stored images.
+        """
+        rows = self.database.connection().execute(
+            "SELECT id FROM imagenes ORDER BY seq"
+        )
+        return [image_id for (image_id,) in rows]
+
+    def get_max_id(self):
+        """
+        Returns the highest numeric image ID, 0 if there are no images.
+        """
+        row = (
+            self.database.connection()
+            .execute(
+                "SELECT MAX(CAST(id AS INTEGER)) FROM imagenes"
+                " WHERE id <> '' AND id NOT GLOB '*[^0-9]*'"
+            )
+            .fetchone()
+        )
+        return row[0] or 0
+
+    def _image(self, row):
+        """Builds an Image from an `imagenes` row; pixels are decoded on first access."""
+        image_id, user_id, editado, nombre, pixeles, count = row
+        image = Image(
+            id=image_id,
+            user_id=user_id,
+            name=nombre,
+            pixels=None,
+            design=lambda: [
+                Pixel(row=row, column=column, color=color)
+                for row, column, color in json.loads(pixeles)
+            ],
+            pixel_count=count,
+        )
+        image.edited = editado == 1
+        return image
+
+    def get_image(self, image_id):
+        """
+        Returns the image with the given ID, through the primary key index, or None.
+        """
+        row = (
+            self.database.connection()
+            .execute(self.IMAGE_QUERY + " WHERE id = ?", (image_id,))
+            .fetchone()
+        )
+        return self._image(row) if row is not None else None
+
+    def iter_images(self, user_id=None):
+        """
+        Yields the stored images, or only those of a user, in storage order,
+        fetching one row at a time.
+        """
+        if user_id is None:
+            rows = self.database.connection().execute(
+                self.IMAGE_QUERY + " ORDER BY seq"
+            )
+        else:
+            rows = self.database.connection().execute(
+                self.IMAGE_QUERY + " WHERE id_usuario = ? ORDER BY seq", (user_id,)
+            )
+
+        for row in rows:
+            yield self._image(row)
+
+    def get_images(self, user_id=None):
+        """
+        Returns all stored images, or only those of a user, in storage order.
+        """
+        return list(self.iter_images(user_id))
+
+    def save_base64(self, image_id, base64_data, user_id, edited=False):
+        """
+        Saves or replaces the base64 render of an image.
+        """
+        with self.database.connection() as connection:
+            connection.execute(
+                "INSERT INTO imagenes_base64 (id, id_usuario, editado, base64)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET id_usuario = excluded.id_usuario,"
+                " editado = excluded.editado, base64 = excluded.base64",
+                (
+                    escape(image_id),
+                    escape(user_id),
+                    1 if edited else 0,
+                    escape(base64_data),
+                ),
+            )
+
+    def get_base64(self, image_id, original_only=False):
+        """
+        Returns the base64 render of an image, or None if there is none.
+        """
+        query = "SELECT base64 FROM imagenes_base64 WHERE id = ?"
+        if original_only:
+            query += " AND editado = 0"
+        row = self.database.connection().execute(query, (image_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_gallery_images(self):
+        """
+        Returns id, id_usuario, editado and base64 of every stored render.
+        """
+        rows = self.database.connection().execute(
+            "SELECT id, id_usuario, editado, base64 FROM imagenes_base64 ORDER BY seq"
+        )
+        return [
+            {
+                "id": image_id,
+                "id_usuario": user_id,
+                "editado": str(editado),
+                "base64": base64_data,
+            }
+            for image_id, user_id, editado, base64_data in rows
+        ]
+
+    def get_render_metadata(self):
+        """
+        Returns id, id_usuario and editado of every stored render, without reading the renders.
+        """
+        rows = self.database.connection().execute(
+            "SELECT id, id_usuario, editado FROM imagenes_base64 ORDER BY seq"
+        )
+        return [
+            {"id": image_id, "id_usuario": user_id, "editado": str(editado)}
+            for image_id, user_id, editado in rows
+        ]
+
+    # Conditions of the partial indexes that order the gallery (see SCHEMA)
+    NUMERIC_ID = "id <> '' AND id NOT GLOB '*[^0-9]*'"
+    TEXT_ID = "(id = '' OR id GLOB '*[^0-9]*')"
+
+    def get_gallery_page(self, limit=None, after=None, user_id=None, with_base64=True):
+        """
+        Returns a window of the stored renders, ordered by image ID.
+
+        Numeric IDs come first, in numeric order, then any other ID in text
+        order, as in id_sort_key. Each part is read from its own partial index
+        starting right after `after`, so only the rows of the page are read.
+        """
+        columns = "id, id_usuario, editado" + (", base64" if with_base64 else "")
+        user_filter = " AND id_usuario = ?" if user_id is not None else ""
+        user_params = (user_id,) if user_id is not None else ()
+        # One extra row tells whether there is a next page (-1: no limit)
+        wanted = limit + 1 if limit is not None else -1
+        connection = self.database.connection()
+
+        rows = []
+        if after is None or after.isdigit():
+            bound = " AND CAST(id AS INTEGER) > ?" if after is not None else ""
+            bound_params = (int(after),) if after is not None else ()
+            rows = connection.execute(
+                f"SELECT {columns} FROM imagenes_base64"
+                f" WHERE {self.NUMERIC_ID}{user_filter}{bound}"
+                " ORDER BY CAST(id AS INTEGER) LIMIT ?",
+                user_params + bound_params + (wanted,),
+            ).fetchall()
+        if limit is None or len(rows) < wanted:
+            bound = " AND id > ?" if after is not None and not after.isdigit() else ""
+            bound_params = (after,) if bound else ()
+            remaining = wanted - len(rows) if limit is not None else -1
+            rows += connection.execute(
+                f"SELECT {columns} FROM imagenes_base64"
+                f" WHERE {self.TEXT_ID}{user_filter}{bound}"
+                " ORDER BY id LIMIT ?",
+                user_params + bound_params + (remaining,),
+            ).fetchall()
+
+        page = []
+        for row in rows[:limit]:
+            entry = {"id": row[0], "id_usuario": row[1], "editado": str(row[2])}
+            if with_base64:
+                entry["base64"] = row[3]
+            page.append(entry)
+        next_after = page[-1]["id"] if page and len(rows) > len(page) else None
+        return page, next_after
+
+
+class SqliteUserStore(UserStore):
+    """
+    Stores users in the `usuarios` table of an SQLite database, indexed by ID.
+
+    Attributes:
+        storage_path (str): Path to the directory where the database is stored.
+        database (SqliteDatabase): The database.
+    """
+
+    COLUMNS = (
+        "id, pwd, nombre_completo, correo_electronico,"
+        " numero_telefono, direccion, perfil"
+    )
+
+    def __init__(self, storage_path):
+        """
+        Initializes the store and ensures the database exists.
+
+        Args:
+            storage_path (str): Path to the directory where the database is stored.
+        """
+        self.storage_path = storage_path
+        self.database = SqliteDatabase(storage_path)
+
+    def _values(self, user):
+        return (
+            user.user_id,
+            user.pwd,
+            user.full_name or "",
+            user.email or "",
+            user.phone_number or "",
+            user.address or "",
+            user.profile_url or "",
+        )
+
+    def _user(self, row):
+        return User(
+            user_id=row[0],
+            pwd=row[1],
+            full_name=row[2],
+            email=row[3],
+            phone_number=row[4],
+            address=row[5],
+            profile_url=row[6],
+        )
+
+    def add_user(self, user):
+        """
+        Inserts a single user.
+
+        Returns:
+            bool: True if successful, False if the user already exists.
+        """
+        with self.database.connection() as connection:
+            cursor = connection.execute(
+                f"INSERT OR IGNORE INTO usuarios ({self.COLUMNS})"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._values(user),
+            )
+        return cursor.rowcount == 1
+
+    def save_users(self, users):
+        """
+        Inserts a list of users in one transaction, skipping those that already exist.
+
+        Returns:
+            list[str]: IDs of the users actually inserted.
+        """
+        saved = []
+        with self.database.connection() as connection:
+            for user in users:
+                cursor = connection.execute(
+                    f"INSERT OR IGNORE INTO usuarios ({self.COLUMNS})"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    self._values(user),
+                )
+                if cursor.rowcount == 1:
+                    saved.append(user.user_id)
+        return saved
+
+    def user_exists(self, user_id):
+        """Check if a user with the given ID already exists."""
+        row = (
+            self.database.connection()
+            .execute("SELECT 1 FROM usuarios WHERE id = ?", (user_id,))
+            .fetchone()
+        )
+        return row is not None
+
+    def get_user(self, user_id):
+        """
+        Returns the user with the given ID, or None.
+        """
+        row = (
+            self.database.connection()
+            .execute(f"SELECT {self.COLUMNS} FROM usuarios WHERE id = ?", (user_id,))
+            .fetchone()
+        )
+        return self._user(row) if row is not None else None
+
+    def get_users(self):
+        """
+        Returns all users, in storage order.
+        """
+        rows = self.database.connection().execute(
+            f"SELECT {self.COLUMNS} FROM usuarios ORDER BY seq"
+        )
+        return [self._user(row) for row in rows]
@@ -0,0 +1,644 @@
+import itertools
+import os
+import threading
+from contextlib import contextmanager
+from xml.etree import ElementTree as ET
+from xml.parsers import expat
+from xml.sax.saxutils import escape
+from models.image import Image
+from models.pixel import Pixel
+from storage.base import ImageStore
+from storage.blob_store import BlobStore
+from storage.file_lock import atomic_write, file_lock
+
+
+def _indent(elem, level=0):
+    """Indents an element in place, two spaces per level."""
+    i = "\n" + level * "  "
+    if len(elem):
+        if not elem.text or not elem.text.strip():
+            elem.text = i + "  "
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+        for subelem in elem:
+            _indent(subelem, level + 1)
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+    else:
+        if level and (not elem.tail or not elem.tail.strip()):
+            elem.tail = i
+
+
+def write_pretty_xml(tree, file_path):
+    """Write XML with compact formatting"""
+    try:
+        root = tree.getroot()
+        _indent(root)
+        with atomic_write(file_path) as f:  # Temp file, fsync and rename
+            tree.write(f, encoding="utf-8", xml_declaration=True)
+    except Exception as e:
+        raise Exception(f"Error writing XML: {str(e)}")
+
+
+def iter_records(source, tag="imagen"):
+    """
+    Streams the <imagen> (or other `tag`) children of the root of an XML file.
+
+    Each element is removed from the tree once the consumer asks for the next
+    one, so memory stays flat whatever the size of the file. Consumers must
+    read what they need from an element before advancing.
+
+    Args:
+        source (str | file): Path or binary file object of the XML file.
+        tag (str): Tag of the records.
+
+    Yields:
+        Element: Each record element, in storage order.
+    """
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1:
+            if elem.tag == tag:
+                yield elem
+            root.remove(elem)
+
+
+def write_records(file_path, root_tag, records):
+    """
+    Writes a stream of <imagen> elements as an XML file, one element at a time.
+
+    The output is byte-for-byte what write_pretty_xml writes for the same tree,
+    and the file is replaced atomically.
+
+    Args:
+        file_path (str): Path of the XML file.
+        root_tag (str): Tag of the root element.
+        records (iterable): The <imagen> elements, in storage order.
+
+    Returns:
+        dict: Image ID -> (start, end) byte span of its record in the file.
+    """
+    try:
+        spans = {}
+        with atomic_write(file_path) as f:
+            position = f.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+            empty = True
+            for elem in records:
+                if empty:
+                    position += f.write(f"<{root_tag}>\n  ".encode("utf-8"))
+                    empty = False
+                _indent(elem, 1)
+                record = ET.tostring(elem, encoding="unicode").encode("utf-8")
+                spans[elem.get("id")] = (position, position + len(record))
+                position += f.write(record)
+            if empty:
+                f.write(f"<{root_tag} />".encode("utf-8"))
+            else:
+                f.write(f"</{root_tag}>\n".encode("utf-8"))
+        return spans
+    except Exception as e:
+        raise Exception(f"Error writing XML: {str(e)}")
+
+
+def scan_records(f):
+    """
+    Reads the attributes and byte span of every <imagen> child of the root.
+
+    Only tags are looked at (no text or Element objects are built); a record's
+    span runs from its start tag to the next child of the root, or to the end
+    tag of the root, so it can be parsed on its own later.
+
+    Args:
+        f (file): Binary file object of the XML file, at its start.
+
+    Returns:
+        list[tuple[dict, int, int]]: (attributes, start, end) of each record.
+    """
+    parser = expat.ParserCreate()
+    records = []
+    pending = []  # [attributes, start] of the record whose end is not known yet
+    depth = 0
+
+    def close_pending():
+        if pending:
+            records.append((pending[0], pending[1], parser.CurrentByteIndex))
+            pending.clear()
+
+    def start_element(tag, attributes):
+        nonlocal depth
+        depth += 1
+        if depth == 2:
+            close_pending()
+            if tag == "imagen":
+                pending.extend((attributes, parser.CurrentByteIndex))
+
+    def end_element(tag):
+        nonlocal depth
+        if depth == 1:
+            close_pending()
+        depth -= 1
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.ParseFile(f)
+    return records
+
+
+def image_to_element(image, edited, parent=None):
+    """
+    Builds the <imagen> element of an image design.
+
+    Args:
+        image (Image): Image to serialize.
+        edited (bool): False if the image is original, True if edited.
+        parent (Element, optional): Element to append the new element to.
+
+    Returns:
+        Element: The <imagen> element.
+    """
+    attributes = {
+        "id": escape(image.id),
+        "id_usuario": escape(image.user_id),
+        "editado": "1" if edited else "0",
+    }
+    if parent is None:
+        image_elem = ET.Element("imagen", attributes)
+    else:
+        image_elem = ET.SubElement(parent, "imagen", attributes)
+    ET.SubElement(image_elem, "nombre").text = escape(image.name)
+
+    # Add the design (pixels)
+    design_elem = ET.SubElement(image_elem, "diseño")
+    for pixel in image.pixels:
+        ET.SubElement(
+            design_elem,
+            "pixel",
+            {"fila": str(pixel.row), "col": str(pixel.column)},
+        ).text = escape(pixel.color)
+    return image_elem
+
+
+def pixels_from_element(design_elem):
+    """
+    Builds the Pixel list of a <diseño> element.
+    """
+    return [
+        Pixel(
+            row=int(pixel_elem.get("fila")),
+            column=int(pixel_elem.get("col")),
+            color=pixel_elem.text,
+        )
+        for pixel_elem in design_elem.findall("pixel")
+    ]
+
+
+def image_from_element(image_elem):
+    """
+    Builds an Image from its <imagen> element.
+
+    The pixels are not built here: the image keeps the <diseño> element and
+    turns it into Pixel objects on first access to `image.pixels`.
+
+    Args:
+        image_elem (Element): The <imagen> element.
+
+    Returns:
+        Image: The parsed image.
+    """
+    design_elem = image_elem.find("diseño")
+    image = Image(
+        id=image_elem.get("id"),
+        user_id=image_elem.get("id_usuario"),
+        name=image_elem.find("nombre").text or "",
+        pixels=None,
+        design=lambda: pixels_from_element(design_elem),
+        pixel_count=len(design_elem),
+    )
+    image.edited = image_elem.get("editado") == "1"
+    return image
+
+
+def render_to_element(image_id, blob_ref, user_id, edited, parent=None):
+    """
+    Builds the <imagen> element referencing the stored render of an image.
+    """
+    attributes = {
+        "id": escape(image_id),
+        "id_usuario": escape(user_id),
+        "editado": "1" if edited else "0",
+        "blob": blob_ref,
+    }
+    if parent is None:
+        return ET.Element("imagen", attributes)
+    return ET.SubElement(parent, "imagen", attributes)
+
+
+def render_metadata(render_elem):
+    """
+    Returns id, id_usuario and editado of a render <imagen> element.
+    """
+    return {
+        "id": render_elem.get("id"),
+        "id_usuario": render_elem.get("id_usuario"),
+        "editado": render_elem.get("editado"),
+    }
+
+
+def render_data(render_elem, blobs):
+    """
+    Returns the base64 render of a render <imagen> element.
+
+    Elements written before renders moved to the blob store hold the base64
+    text inline; they are still read as is.
+    """
+    blob_ref = render_elem.get("blob")
+    if blob_ref:
+        return blobs.get(blob_ref)
+    return render_elem.text
+
+
+def gallery_entry(render_elem, blobs):
+    """
+    Returns the gallery dictionary of a render <imagen> element.
+    """
+    entry = render_metadata(render_elem)
+    entry["base64"] = render_data(render_elem, blobs)
+    return entry
+
+
+class IndexedXmlFile:
+    """
+    In-memory index of an XML file of <imagen> records.
+
+    The file is scanned once and only the attributes and byte span of each
+    record are kept, indexed by image ID and user ID; the records themselves
+    (pixels, inline renders) are read from the file when needed, by seeking to
+    their span or streaming the file, so memory stays flat as the file grows. The index is rebuilt only when the file
+    is replaced or its modification time or size changes, so edits made by
+    other processes are still picked up.
+
+    Writes go through update(), which holds an exclusive lock on
+    `<file>.lock` while it reloads the index and streams the file into its new
+    version, so writers in different processes never lose each other's records.
+    The file is always replaced atomically, so readers need no lock.
+
+    Attributes:
+        file_path (str): Path to the XML file.
+        root_tag (str): Tag of the root element.
+        by_id (dict): Image ID -> attributes of its <imagen> element.
+        by_user (dict): User ID -> list of image IDs, in storage order.
+        spans (dict): Image ID -> (start, end) byte span of its record.
+        max_id (int): Highest numeric image ID, 0 if there is none.
+    """
+
+    def __init__(self, file_path, root_tag):
+        self.file_path = file_path
+        self.root_tag = root_tag
+        self.lock_file = f"{file_path}.lock"
+        self.by_id = {}
+        self.by_user = {}
+        self.spans = {}
+        self.max_id = 0
+        self.stamp = None
+        self.appended = []  # New elements of the running update
+        self.replaced = {}  # Image ID -> replacement element of the running update
+        self.lock = threading.RLock()
+
+    def _file_stamp(self, stat):
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        """
+        Rebuilds the index if the file changed since it was last loaded or written.
+
+        Returns:
+            IndexedXmlFile: self, to chain lookups.
+        """
+        with self.lock:
+            stamp = self._file_stamp(os.stat(self.file_path))
+            if stamp != self.stamp:
+                with open(self.file_path, "rb") as f:
+                    # Stamp of the file actually read, even if it was just replaced
+                    stamp = self._file_stamp(os.fstat(f.fileno()))
+                    self.by_id = {}
+                    self.by_user = {}
+                    self.max_id = 0
+                    self.spans = {}
+                    for attributes, start, end in scan_records(f):
+                        self._index(attributes)
+                        self.spans[attributes["id"]] = (start, end)
+                self.stamp = stamp
+            return self
+
+    def _index(self, attributes):
+        image_id = attributes["id"]
+        previous = self.by_id.get(image_id)
+        if previous is None:
+            self.by_user.setdefault(attributes["id_usuario"], []).append(image_id)
+        elif previous["id_usuario"] != attributes["id_usuario"]:
+            self.by_user[previous["id_usuario"]].remove(image_id)
+            self.by_user.setdefault(attributes["id_usuario"], []).append(image_id)
+        self.by_id[image_id] = attributes
+        if image_id.isdigit():
+            self.max_id = max(self.max_id, int(image_id))
+
+    def attributes(self, image_id):
+        """
+        Returns the attributes of a record, or None if there is none.
+        """
+        with self.lock:
+            return self.load().by_id.get(image_id)
+
+    def append(self, elem):
+        """
+        Adds a new <imagen> element at the end of the file, within update().
+        """
+        self.appended.append(elem)
+        self._index(dict(elem.attrib))
+
+    def replace(self, elem):
+        """
+        Replaces the <imagen> element with the same ID, within update().
+        """
+        self.replaced[elem.get("id")] = elem
+        self._index(dict(elem.attrib))
+
+    @contextmanager
+    def update(self):
+        """
+        Reloads the index under an exclusive file lock for a read-modify-write.
+
+        When the block ends, the file is streamed into a new version with the
+        replaced and appended elements, if there are any. If the block raises,
+        nothing is written and the index is rebuilt on next access.
+        """
+        with self.lock, file_lock(self.lock_file):
+            self.load()
+            try:
+                yield self
+                if self.appended or self.replaced:
+                    records = (
+                        self.replaced.get(elem.get("id"), elem)
+                        for elem in iter_records(self.file_path)
+                    )
+                    self.spans = write_records(
+                        self.file_path,
+                        self.root_tag,
+                        itertools.chain(records, self.appended),
+                    )
+                    self.stamp = self._file_stamp(os.stat(self.file_path))
+            except BaseException:
+                self.stamp = None
+                raise
+            finally:
+                self.appended = []
+                self.replaced = {}
+
+    def iter_elements(self, user_id=None):
+        """
+        Yields the <imagen> elements, or only those of a user, in storage order.
+
+        All elements are streamed from the file; a user's elements are read
+        directly from their byte spans, without reading any other record.
+        """
+        if user_id is None:
+            yield from iter_records(self.file_path)
+            return
+
+        with self.lock:
+            image_ids = list(self.load().by_user.get(user_id, ()))
+        for image_id in image_ids:
+            elem = self.read(image_id)
+            if elem is not None:
+                yield elem
+
+    def read(self, image_id):
+        """
+        Reads and parses the <imagen> element of an ID from its byte span.
+
+        Returns:
+            Element: The element, or None if there is no record with that ID.
+        """
+        with self.lock:
+            while True:
+                self.load()
+                span = self.spans.get(image_id)
+                if span is None:
+                    return None
+                with open(self.file_path, "rb") as f:
+                    if self._file_stamp(os.fstat(f.fileno())) != self.stamp:
+                        continue  # Replaced after the index was built, reload it
+                    f.seek(span[0])
+                    return ET.fromstring(f.read(span[1] - span[0]))
+
+
+class XmlImageStore(ImageStore):
+    """
+    Stores image designs in imagenes.xml and the metadata of their renders in
+    imagenes_base64.xml; the renders themselves live in a BlobStore.
+
+    Both files are indexed in memory by image ID and user ID (attributes only)
+    and streamed with iterparse when records are read. Every write still
+    rewrites the whole file, streaming it under a file lock into a temp file
+    that is renamed into place.
+
+    Attributes:
+        storage_path (str): Path to the directory where the XML files are stored.
+        images_file (str): Path to the images XML file.
+        base64_file (str): Path to the base64 renders XML file.
+        images (IndexedXmlFile): Index of the images XML file.
+        renders (IndexedXmlFile): Index of the base64 renders XML file.
+        blobs (BlobStore): Content-addressed store of the rendered images.
+    """
+
+    def __init__(self, storage_path):
+        """
+        Initializes the store and ensures the XML files exist.
+
+        Args:
+            storage_path (str): Path to the directory where the XML files are stored.
+        """
+        self.storage_path = storage_path
+        self.images_file = os.path.join(self.storage_path, "imagenes.xml")
+        self.base64_file = os.path.join(self.storage_path, "imagenes_base64.xml")
+
+        # Create storage directory if it doesn't exist
+        os.makedirs(self.storage_path, exist_ok=True)
+
+        # Initialize XML files if they don't exist
+        self._initialize_file(self.images_file, "imagenes")
+        self._initialize_file(self.base64_file, "imagenes_base64")
+
+        # Rendered images, referenced from imagenes_base64.xml by content hash
+        self.blobs = BlobStore(os.path.join(self.storage_path, "renders"))
+
+        # Indexes of both files, rebuilt only when they change
+        self.images = IndexedXmlFile(self.images_file, "imagenes")
+        self.renders = IndexedXmlFile(self.base64_file, "imagenes_base64")
+
+    def _initialize_file(self, file_path, root_tag):
+        """
+        Initializes an XML file with an empty root element if it does not already exist.
+        """
+        if not os.path.exists(file_path):
+            with file_lock(f"{file_path}.lock"):
+                if not os.path.exists(file_path):  # Another worker may have won
+                    root = ET.Element(root_tag)
+                    tree = ET.ElementTree(root)
+                    write_pretty_xml(tree, file_path)
+
+    def add_image(self, image, edited=False):
+        """
+        Appends the design of an image to imagenes.xml.
+
+        Args:
+            image (Image): Image to store. Must have an ID.
+            edited (bool): False if the image is original, True if edited.
+
+        Returns:
+            bool: True if the image was stored, False if an image with the same ID already exists.
+        """
+        with self.images.update():
+            if image.id in self.images.by_id:
+                return False
+
+            # Saved to the XML file when the update ends
+            self.images.append(image_to_element(image, edited))
+            return True
+
+    def image_exists(self, image_id):
+        """
+        Checks if an image with the given ID already exists.
+        """
+        return self.images.attributes(image_id) is not None
+
+    def get_image_ids(self):
+        """
+        Returns the IDs of all stored images.
+        """
+        with self.images.lock:
+            return list(self.images.load().by_id)
+
+    def get_max_id(self):
+        """
+        Returns the highest numeric image ID, 0 if there are no images.
+        """
+        with self.images.lock:
+            return self.images.load().max_id
+
+    def get_image(self, image_id):
+        """
+        Returns the image with the given ID, reading only its own record, or None.
+        """
+        image_elem = self.images.read(image_id)
+        return image_from_element(image_elem) if image_elem is not None else None
+
+    def iter_images(self, user_id=None):
+        """
+        Streams the stored images, or only those of a user, in storage order.
+
+        Args:
+            user_id (str, optional): ID of the user to filter by.
+
+        Yields:
+            Image: Each image; records are parsed one at a time and then dropped.
+        """
+        for image_elem in self.images.iter_elements(user_id):
+            yield image_from_element(image_elem)
+
+    def get_images(self, user_id=None):
+        """
+        Returns all stored images, or only those of a user.
+
+        Args:
+            user_id (str, optional): ID of the user to filter by.
+
+        Returns:
+            list[Image]: The images, in storage order.
+        """
+        return list(self.iter_images(user_id))
+
+    def save_base64(self, image_id, base64_data, user_id, edited=False):
+        """
+        Stores the render of an image in the blob store and saves or replaces its
+        reference in imagenes_base64.xml.
+        """
+        blob_ref = self.blobs.put(base64_data)
+        render_elem = render_to_element(image_id, blob_ref, user_id, edited)
+
+        with self.renders.update():
+            # Replace the render of the image if it already exists (dropping any
+            # inline base64 of an older format), or add a new render entry
+            if image_id in self.renders.by_id:
+                self.renders.replace(render_elem)
+            else:
+                self.renders.append(render_elem)
+
+    def get_base64(self, image_id, original_only=False):
+        """
+        Returns the base64 render of an image, or None if there is none.
+
+        Args:
+            image_id (str): The ID of the image.
+            original_only (bool): If True, only match original images (editado="0").
+        """
+        attributes = self.renders.attributes(image_id)
+        if attributes is None:
+            return None
+        if original_only and attributes.get("editado") != "0":
+            return None
+        if attributes.get("blob"):
+            return self.blobs.get(attributes["blob"])
+
+        # Render of an older format, held inline in the file
+        render_elem = self.renders.read(image_id)
+        return render_elem.text if render_elem is not None else None
+
+    def get_gallery_images(self):
+        """
+        Returns id, id_usuario, editado and base64 of every stored render.
+        """
+        return [
+            gallery_entry(render_elem, self.blobs)
+            for render_elem in self.renders.iter_elements()
+        ]
+
+    def get_render_metadata(self):
+        """
+        Returns id, id_usuario and editado of every stored render, from the index alone.
+        """
+        with self.renders.lock:
+            return [
+                {
+                    "id": image_id,
+                    "id_usuario": attributes["id_usuario"],
+                    "editado": attributes["editado"],
+                }
+                for image_id, attributes in self.renders.load().by_id.items()
+            ]
+
+    def externalize_renders(self):
+        """
+        Moves the base64 renders held inline in imagenes_base64.xml to the blob store.
+
+        Returns:
+            int: Number of renders moved.
+        """
+        with self.renders.update():
+            moved = 0
+            for render_elem in self.renders.iter_elements():
+                if render_elem.get("blob") or not render_elem.text:
+                    continue
+                blob_ref = self.blobs.put(render_elem.text.strip())
+                self.renders.replace(
+                    ET.Element("imagen", dict(render_elem.attrib, blob=blob_ref))
+                )
+                moved += 1
+            return moved
@@ -0,0 +1,236 @@
+import itertools
+import os
+import threading
+import xml.etree.ElementTree as ET
+from models.user import User
+from storage.base import UserStore
+from storage.file_lock import atomic_write, file_lock
+from storage.xml_image_store import iter_records
+from utils.xml_writer import XmlWriter
+
+
+def user_to_element(user, parent=None):
+    """
+    Builds the <usuario> element of a user, appended to `parent` if given.
+    """
+    attributes = {"id": user.user_id, "pwd": user.pwd}
+    if parent is None:
+        user_elem = ET.Element("usuario", attributes)
+    else:
+        user_elem = ET.SubElement(parent, "usuario", attributes)
+    ET.SubElement(user_elem, "NombreCompleto").text = user.full_name
+    ET.SubElement(user_elem, "CorreoElectronico").text = user.email
+    ET.SubElement(user_elem, "NumeroTelefono").text = user.phone_number
+    ET.SubElement(user_elem, "Direccion").text = user.address
+    ET.SubElement(user_elem, "Perfil").text = user.profile_url
+    return user_elem
+
+
+def user_from_element(user_elem):
+    """
+    Builds a User from its <usuario> element.
+    """
+    return User(
+        user_id=user_elem.get("id"),
+        pwd=user_elem.get("pwd"),
+        full_name=user_elem.find("NombreCompleto").text or "",
+        email=user_elem.find("CorreoElectronico").text or "",
+        phone_number=user_elem.find("NumeroTelefono").text or "",
+        address=user_elem.find("Direccion").text or "",
+        profile_url=user_elem.find("Perfil").text or "",
+    )
+
+
+class UserDirectory:
+    """
+    In-memory directory of the users of usuarios.xml.
+
+    The file is parsed once into a dictionary keyed by user ID, so lookups
+    don't parse the file. The directory is rebuilt only when the file is
+    replaced or its modification time or size changes, so users added by other
+    processes are still found.
+
+    There is deliberately no index by email: users sign in with their ID only,
+    and nothing else looks users up by email.
+
+    Attributes:
+        users_file (str): Path to the users XML file.
+        by_id (dict): User ID -> User.
+    """
+
+    def __init__(self, users_file):
+        self.users_file = users_file
+        self.by_id = {}
+        self.stamp = None
+        self.lock = threading.Lock()
+
+    def _file_stamp(self, stat):
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        """
+        Rebuilds the directory if the file changed since it was last loaded.
+
+        Returns:
+            UserDirectory: self, to chain lookups.
+        """
+        with self.lock:
+            stamp = self._file_stamp(os.stat(self.users_file))
+            if stamp != self.stamp:
+                with open(self.users_file, "rb") as f:
+                    # Stamp of the file actually read, even if it was just replaced
+                    stamp = self._file_stamp(os.fstat(f.fileno()))
+                    by_id = {}
+                    for _, user_elem in ET.iterparse(f):
+                        if user_elem.tag != "usuario":
+                            continue
+                        user = user_from_element(user_elem)
+                        by_id.setdefault(user.user_id, user)
+                        user_elem.clear()
+                self.by_id = by_id
+                self.stamp = stamp
+            return self
+
+    def extend(self, users, previous_stamp):
+        """
+        Adds users that were just appended to the file, instead of reloading it.
+
+        Args:
+            users (list[User]): The appended users.
+            previous_stamp (tuple): Stamp of the file the users were appended to;
+                if the directory was built from another version, it is reloaded
+                on next access instead.
+        """
+        with self.lock:
+            if self.stamp is None or self.stamp != previous_stamp:
+                self.stamp = None
+                return
+            for user in users:
+                self.by_id.setdefault(user.user_id, user)
+            self.stamp = self._file_stamp(os.stat(self.users_file))
+
+    def get(self, user_id):
+        """Returns the user with the given ID, or None."""
+        return self.load().by_id.get(user_id)
+
+
+class XmlUserStore(UserStore):
+    """
+    Stores users in usuarios.xml.
+
+    Writes stream the file into a new version with the new users appended,
+    under an exclusive file lock, and replace it atomically, so readers need no
+    lock. Lookups go through a UserDirectory of the file.
+
+    Attributes:
+        storage_path (str): Path to the directory where the XML file is stored.
+        users_file (str): Path to the users XML file.
+        lock_file (str): Lock file serializing writes to the users file.
+        directory (UserDirectory): Users indexed by ID.
+    """
+
+    def __init__(self, storage_path):
+        """
+        Initializes the store and ensures the XML file exists.
+
+        Args:
+            storage_path (str): Path to the directory where the XML file is stored.
+        """
+        self.storage_path = storage_path
+        self.users_file = os.path.join(self.storage_path, "usuarios.xml")
+        self.lock_file = f"{self.users_file}.lock"
+
+        # Create storage directory if it doesn't exist
+        os.makedirs(self.storage_path, exist_ok=True)
+
+        # Initialize XML files if they don't exist
+        self._initialize_users_file()
+        self.directory = UserDirectory(self.users_file)
+
+    def _initialize_users_file(self):
+        """Initialize the users XML file if it doesn't exist."""
+        if not os.path.exists(self.users_file):
+            with file_lock(self.lock_file):
+                if not os.path.exists(self.users_file):  # Another worker may have won
+                    self._write_users(())
+
+    def _write_users(self, user_elems):
+        """
+        Writes a stream of <usuario> elements as the users file, one at a time.
+        """
+        try:
+            with atomic_write(self.users_file, "w", encoding="utf-8") as f:
+                writer = XmlWriter(f.write)
+                writer.declaration()
+                writer.start("usuarios")
+                for user_elem in user_elems:
+                    writer.element(user_elem)
+                writer.end()
+        except (ET.ParseError, IOError) as e:
+            raise Exception(f"Error writing XML: {e}")
+
+    def _append_users(self, users):
+        """
+        Appends the users whose IDs are not stored yet, within the file lock.
+
+        Returns:
+            list[str]: IDs of the users actually appended.
+        """
+        directory = self.directory.load()
+        existing = directory.by_id.keys()
+        seen = set()
+        new_users = []
+        for user in users:
+            if user.user_id in existing or user.user_id in seen:
+                continue  # Skip duplicate users
+            seen.add(user.user_id)
+            new_users.append(user)
+
+        if new_users:
+            previous_stamp = directory.stamp
+            self._write_users(
+                itertools.chain(
+                    iter_records(self.users_file, "usuario"),
+                    (user_to_element(user) for user in new_users),
+                )
+            )
+            self.directory.extend(new_users, previous_stamp)
+        return [user.user_id for user in new_users]
+
+    def add_user(self, user):
+        """
+        Appends a user to usuarios.xml.
+
+        Returns:
+            bool: True if successful, False if the user already exists.
+        """
+        with file_lock(self.lock_file):
+            return bool(self._append_users([user]))
+
+    def save_users(self, users):
+        """
+        Appends a list of users to usuarios.xml, skipping those that already exist.
+
+        Returns:
+            list[str]: IDs of the users actually appended.
+        """
+        self._initialize_users_file()
+        with file_lock(self.lock_file):
+            return self._append_users(users)
+
+    def user_exists(self, user_id):
+        """Check if a user with the given ID already exists."""
+        return self.directory.get(user_id) is not None
+
+    def get_user(self, user_id):
+        """
+        Returns the user with the given ID, or None.
+        """
+        return self.directory.get(user_id)
+
+    def get_users(self):
+        """
+        Returns all users, in storage order.
+        """
+        root = ET.parse(self.users_file).getroot()
+        return [user_from_element(user_elem) for user_elem in root.findall("usuario")]
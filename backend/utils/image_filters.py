@@ -0,0 +1,153 @@
+import re
+from utils.color_utils import hex_to_rgb, rgb_to_hex
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the per-pixel path is used without it
+    np = None
+
+
+# Each filter is a 3x3 matrix applied to (R, G, B) plus a constant offset,
+# followed by int() truncation and clamping to 255.
+FILTER_MATRICES = {
+    "grayscale": (
+        ((0.2989, 0.5870, 0.1140), (0.2989, 0.5870, 0.1140), (0.2989, 0.5870, 0.1140)),
+        0,
+    ),
+    "sepia": (
+        ((0.393, 0.769, 0.189), (0.349, 0.686, 0.168), (0.272, 0.534, 0.131)),
+        0,
+    ),
+    "negative": (
+        ((-1, 0, 0), (0, -1, 0), (0, 0, -1)),
+        255,
+    ),
+}
+
+# Use the palette (lookup table) path when distinct colors are at most this
+# fraction of the pixels; above it the fully vectorized path is cheaper.
+PALETTE_MAX_RATIO = 0.5
+
+_HEX_RE = re.compile(r"[0-9a-fA-F]*")
+
+
+def apply_filter_rgb(r, g, b, filter_type):
+    """
+    Applies a filter to a single RGB color.
+
+    Args:
+        r (int): Red component (0-255).
+        g (int): Green component (0-255).
+        b (int): Blue component (0-255).
+        filter_type (str): 'grayscale', 'sepia' or 'negative'.
+
+    Returns:
+        tuple: The filtered (R, G, B) values.
+    """
+    if filter_type == "grayscale":
+        gray = int(0.2989 * r + 0.5870 * g + 0.1140 * b)
+        return gray, gray, gray
+    if filter_type == "sepia":
+        return (
+            min(int(0.393 * r + 0.769 * g + 0.189 * b), 255),
+            min(int(0.349 * r + 0.686 * g + 0.168 * b), 255),
+            min(int(0.272 * r + 0.534 * g + 0.131 * b), 255),
+        )
+    if filter_type == "negative":
+        return 255 - r, 255 - g, 255 - b
+    raise ValueError("Unsupported filter type.")
+
+
+def apply_filter(colors, filter_type):
+    """
+    Applies a filter to a list of HEX colors one color at a time.
+
+    Args:
+        colors (list[str]): Colors in HEX format (#RRGGBB).
+        filter_type (str): 'grayscale', 'sepia' or 'negative'.
+
+    Returns:
+        list[str]: The filtered colors in HEX format.
+    """
+    return [rgb_to_hex(*apply_filter_rgb(*hex_to_rgb(c), filter_type)) for c in colors]
+
+
+def apply_filter_batch(colors, filter_type):
+    """
+    Applies a filter to a list of HEX colors in one vectorized pass.
+
+    All colors are parsed into an (n, 3) uint8 array, multiplied by the filter
+    matrix, truncated and clamped, and formatted back in bulk. The products are
+    summed channel by channel in the same order as apply_filter_rgb, so the
+    output is byte-identical to the per-pixel path. Falls back to apply_filter
+    when NumPy is missing or a color is not a plain 6-digit HEX value (so the
+    same ValueError is raised for invalid input).
+
+    Args:
+        colors (list[str]): Colors in HEX format (#RRGGBB).
+        filter_type (str): 'grayscale', 'sepia' or 'negative'.
+
+    Returns:
+        list[str]: The filtered colors in HEX format.
+    """
+    if filter_type not in FILTER_MATRICES:
+        raise ValueError("Unsupported filter type.")
+
+    if np is None or not colors:
+        return apply_filter(colors, filter_type)
+
+    digits = [c[1:] if c.startswith("#") else c for c in colors]
+    joined = "".join(digits)
+    if any(len(d) != 6 for d in digits) or not _HEX_RE.fullmatch(joined):
+        return apply_filter(colors, filter_type)
+
+    rgb = np.frombuffer(bytes.fromhex(joined), dtype=np.uint8).reshape(-1, 3)
+    rgb = rgb.astype(np.float64)
+
+    matrix, offset = FILTER_MATRICES[filter_type]
+    matrix = np.array(matrix, dtype=np.float64)
+    result = (
+        rgb[:, 0:1] * matrix[:, 0]
+        + rgb[:, 1:2] * matrix[:, 1]
+        + rgb[:, 2:3] * matrix[:, 2]
+        + offset
+    )
+    result = np.minimum(np.trunc(result), 255).astype(np.uint8)
+
+    hex_digits = result.tobytes().hex()
+    return ["#" + hex_digits[i : i + 6] for i in range(0, len(hex_digits), 6)]
+
+
+def color_palette(colors):
+    """
+    Returns the distinct colors of a list, in order of first appearance.
+
+    Args:
+        colors (list[str]): Colors in HEX format (#RRGGBB).
+
+    Returns:
+        list[str]: The unique colors.
+    """
+    return list(dict.fromkeys(colors))
+
+
+def apply_filter_palette(colors, filter_type, palette=None):
+    """
+    Applies a filter once per distinct color and maps every pixel through the result.
+
+    Pixel-art designs reuse a few dozen colors across thousands of pixels, so the
+    filter is evaluated on the palette only and the output is built from a lookup
+    table; pixels with the same color share the same result string object.
+
+    Args:
+        colors (list[str]): Colors in HEX format (#RRGGBB).
+        filter_type (str): 'grayscale', 'sepia' or 'negative'.
+        palette (list[str], optional): Precomputed color_palette(colors).
+
+    Returns:
+        tuple: (list[str] filtered colors, int palette size).
+    """
+    if palette is None:
+        palette = color_palette(colors)
+    lut = dict(zip(palette, apply_filter_batch(palette, filter_type)))
+    return [lut[color] for color in colors], len(palette)
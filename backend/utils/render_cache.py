@@ -0,0 +1,147 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """
+    Content-addressed on-disk cache of rendered matrices with size-based LRU eviction.
+
+    Entries are keyed by a hash of the matrix cells (row, column, color), which are
+    iterated in row-major order, plus the renderer id, so the same design rendered
+    by the same renderer is only laid out once.
+
+    Attributes:
+        cache_dir (str): Directory holding one file per cached render.
+        max_bytes (int): Total size above which the least recently used entries are evicted.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that had to render.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        """
+        Initializes the cache and loads the entries already on disk, oldest first.
+
+        Args:
+            cache_dir (str): Directory holding the cached renders.
+            max_bytes (int): Maximum total size of the cached renders.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".b64"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def make_key(matrix, renderer_id):
+        """
+        Builds the cache key of a matrix rendered by a given renderer.
+
+        Args:
+            matrix (SparseMatrix | CompactSparseMatrix): Matrix to render.
+            renderer_id (str): Identifier of the renderer and its options.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        digest = hashlib.sha256(renderer_id.encode("utf-8"))
+        for row, column, color in matrix:
+            digest.update(f"\n{row},{column},{color}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.b64")
+
+    def get(self, key):
+        """
+        Returns the cached render for a key, or None if it isn't cached.
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = f.read()
+            os.utime(self._path(key))  # Mark as recently used for other processes
+        except OSError:
+            with self.lock:
+                self.misses += 1
+                if key in self.entries:
+                    self.total_bytes -= self.entries.pop(key)
+            return None
+
+        with self.lock:
+            self.hits += 1
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            else:
+                self.entries[key] = len(data)
+                self.total_bytes += len(data)
+        return data
+
+    def put(self, key, data):
+        """
+        Stores a render and evicts the least recently used entries over max_bytes.
+        """
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)
+            self.entries[key] = len(data)
+            self.total_bytes += len(data)
+
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_key, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+
+    def get_or_render(self, matrix, renderer_id, render):
+        """
+        Returns the cached render of a matrix, rendering and storing it on a miss.
+
+        Args:
+            matrix (SparseMatrix | CompactSparseMatrix): Matrix to render.
+            renderer_id (str): Identifier of the renderer and its options.
+            render (callable): Renders the matrix and returns the base64 output.
+
+        Returns:
+            str: The base64 render.
+        """
+        key = self.make_key(matrix, renderer_id)
+        data = self.get(key)
+        if data is None:
+            data = render()
+            if data:  # Failed renders come back empty and are not cached
+                self.put(key, data)
+        return data
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and the current cache size.
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
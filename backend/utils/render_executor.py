@@ -0,0 +1,171 @@
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import RENDER_POOL_SIZE, RENDER_TIMEOUT, RENDER_MAX_QUEUE
+
+
+class RenderQueueFullError(Exception):
+    """Raised when a render is submitted while the executor queue is full."""
+
+
+class RenderExecutor:
+    """
+    Runs Graphviz renders with bounded concurrency, a per-render timeout and a queue-depth limit.
+
+    Each render is a `dot` process; at most `pool_size` of them run at once, at
+    most `max_queue` more wait for a slot, and anything beyond that is rejected
+    with RenderQueueFullError instead of piling up more processes.
+
+    Attributes:
+        pool_size (int): Maximum number of Graphviz processes running at once.
+        timeout (float): Seconds a single render may run before it is killed.
+        max_queue (int): Maximum number of renders waiting for a free slot.
+    """
+
+    def __init__(self, pool_size, timeout, max_queue):
+        """
+        Initializes the executor.
+
+        Args:
+            pool_size (int): Maximum number of Graphviz processes running at once.
+            timeout (float): Seconds a single render may run before it is killed.
+            max_queue (int): Maximum number of renders waiting for a free slot.
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="graphviz"
+        )
+        self.pending = 0  # Renders running or waiting for a slot
+        self.lock = threading.Lock()
+        self.stats = {
+            "renders": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "total_bytes": 0,
+            "max_bytes": 0,
+        }
+
+    def render(self, dotcode, format="svg", engine="dot"):
+        """
+        Renders DOT source with Graphviz.
+
+        Args:
+            dotcode (str): Graph in DOT language.
+            format (str): Graphviz output format.
+            engine (str): Graphviz layout executable.
+
+        Returns:
+            bytes: The rendered output.
+
+        Raises:
+            RenderQueueFullError: If pool_size + max_queue renders are already pending.
+            RuntimeError: If Graphviz fails, is missing or times out.
+        """
+        with self.lock:
+            if self.pending >= self.pool_size + self.max_queue:
+                self.stats["rejected"] += 1
+                raise RenderQueueFullError(
+                    f"Render queue is full ({self.pending} renders pending), try again later."
+                )
+            self.pending += 1
+
+        try:
+            return self.executor.submit(self._run, dotcode, format, engine).result()
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def _run(self, dotcode, format, engine):
+        start = time.perf_counter()
+        try:
+            process = subprocess.run(
+                [engine, f"-T{format}"],
+                input=dotcode.encode("utf-8"),
+                capture_output=True,
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            self._record(start, None, timed_out=True)
+            raise RuntimeError(f"Graphviz render timed out after {self.timeout}s.")
+        except FileNotFoundError:
+            self._record(start, None)
+            raise RuntimeError(f"Graphviz executable '{engine}' not found.")
+
+        if process.returncode != 0:
+            self._record(start, None)
+            raise RuntimeError(
+                f"Graphviz failed: {process.stderr.decode('utf-8', 'replace').strip()}"
+            )
+
+        self._record(start, process.stdout)
+        return process.stdout
+
+    def _record(self, start, output, timed_out=False):
+        """Records the duration and output size of a finished render."""
+        seconds = time.perf_counter() - start
+        with self.lock:
+            stats = self.stats
+            if output is None:
+                stats["failures"] += 1
+                if timed_out:
+                    stats["timeouts"] += 1
+                return
+            stats["renders"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["total_bytes"] += len(output)
+            stats["max_bytes"] = max(stats["max_bytes"], len(output))
+
+    def metrics(self):
+        """
+        Returns render counts, durations and output sizes.
+        """
+        with self.lock:
+            metrics = dict(self.stats)
+            metrics["pending"] = self.pending
+            metrics["pool_size"] = self.pool_size
+            metrics["max_queue"] = self.max_queue
+        renders = metrics["renders"]
+        metrics["avg_seconds"] = metrics["total_seconds"] / renders if renders else 0.0
+        metrics["avg_bytes"] = metrics["total_bytes"] / renders if renders else 0
+        return metrics
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_render_executor():
+    """
+    Returns the process-wide render executor, creating it from the configuration on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = RenderExecutor(
+                RENDER_POOL_SIZE or os.cpu_count() or 1,
+                RENDER_TIMEOUT,
+                RENDER_MAX_QUEUE,
+            )
+        return _executor
+
+
+def render_dot(dotcode, format="svg"):
+    """
+    Renders DOT source through the process-wide render executor.
+
+    Args:
+        dotcode (str): Graph in DOT language.
+        format (str): Graphviz output format.
+
+    Returns:
+        bytes: The rendered output.
+    """
+    return get_render_executor().render(dotcode, format)
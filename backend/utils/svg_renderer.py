@@ -0,0 +1,67 @@
+import base64
+from xml.sax.saxutils import quoteattr
+
+# Side in SVG user units of a single pixel-art cell
+CELL_SIZE = 10
+
+
+def render_svg(cells, cell_size=CELL_SIZE):
+    """
+    Renders matrix cells as an SVG pixel grid, without going through Graphviz.
+
+    Cells are written as <rect> elements straight from their row, column and
+    color; adjacent cells of a row with the same color are merged into one
+    wider rect.
+
+    Args:
+        cells (iterable): (row, column, color) tuples in row-major order, as
+            yielded by iterating a SparseMatrix or CompactSparseMatrix.
+        cell_size (int): Side of a cell in SVG units.
+
+    Returns:
+        str: The base64 representation of the SVG, same contract as SparseMatrix.plot().
+    """
+    rects = []
+    min_row = min_col = max_row = max_col = None
+    run = None  # [row, first column, last column, color]
+
+    def flush(run):
+        rects.append(
+            f'<rect x="{run[1] * cell_size}" y="{run[0] * cell_size}" '
+            f'width="{(run[2] - run[1] + 1) * cell_size}" height="{cell_size}" '
+            f"fill={quoteattr(str(run[3]))}/>"
+        )
+
+    for row, col, color in cells:
+        if min_row is None:
+            min_row = max_row = row
+            min_col = max_col = col
+        else:
+            max_row = row
+            min_col = min(min_col, col)
+            max_col = max(max_col, col)
+
+        if run and run[0] == row and run[2] + 1 == col and run[3] == color:
+            run[2] = col
+        else:
+            if run:
+                flush(run)
+            run = [row, col, col, color]
+    if run:
+        flush(run)
+
+    if min_row is None:  # Empty matrix
+        min_row = min_col = width = height = 0
+    else:
+        width = (max_col - min_col + 1) * cell_size
+        height = (max_row - min_row + 1) * cell_size
+
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{width}" height="{height}" '
+        f'viewBox="{min_col * cell_size} {min_row * cell_size} {width} {height}" '
+        'shape-rendering="crispEdges">'
+        + "".join(rects)
+        + "</svg>"
+    )
+    return base64.b64encode(svg.encode("utf-8")).decode("utf-8")
@@ -1,43 +1,77 @@
 from xml.etree import ElementTree as ET
+from storage.xml_image_store import iter_records
 from utils.validators import validate_user_id, validate_email, validate_phone
 from models.user import User
 from models.image import Image
 from models.pixel import Pixel
 
 
-def parse_users(xml_content):
+USER_FIELDS = (
+    "NombreCompleto",
+    "CorreoElectronico",
+    "NumeroTelefono",
+    "Direccion",
+    "Perfil",
+)
+
+
+def _validate_user(user_elem):
     """
-    Parse and validate users from XML content.
-    Args:
-        xml_content (str): Raw XML content.
+    Builds and validates the User of a <usuario> element.
+
     Returns:
-        list[User]: List of valid User objects.
+        tuple: (User, None) if the user is valid, otherwise (None, reason).
+    """
+    fields = {}
+    for tag in USER_FIELDS:
+        field_elem = user_elem.find(tag)
+        if field_elem is None:
+            return None, f"Missing {tag}"
+        fields[tag] = field_elem.text or ""
+
+    user = User(
+        user_id=user_elem.get("id") or "",
+        pwd=user_elem.get("pwd"),
+        full_name=fields["NombreCompleto"],
+        email=fields["CorreoElectronico"],
+        phone_number=fields["NumeroTelefono"],
+        address=fields["Direccion"],
+        profile_url=fields["Perfil"],
+    )
+
+    if not validate_user_id(user.user_id):
+        return None, "Invalid user ID"
+    if not user.pwd:
+        return None, "Missing password"
+    if not validate_email(user.email):
+        return None, "Invalid email"
+    if not validate_phone(user.phone_number):
+        return None, "Invalid phone number"
+    return user, None
+
+
+def iter_users(source):
+    """
+    Streams and validates the users of an XML file, one <usuario> at a time.
+
+    Each element is discarded once validated, so memory doesn't grow with the
+    size of the file.
+
+    Args:
+        source (str | file): Path or binary file object of the XML file.
+
+    Yields:
+        tuple: (user_id, User, None) for each valid user, and
+            (user_id, None, reason) for each invalid one, in file order.
+
+    Raises:
+        ValueError: If the XML is malformed. Records before the error have
+            already been yielded.
     """
     try:
-        root = ET.fromstring(xml_content)
-        users = []
-
-        for user_elem in root.findall("usuario"):
-
-            user = User(
-                user_id=user_elem.get("id"),
-                pwd=user_elem.get("pwd"),
-                full_name=user_elem.find("NombreCompleto").text or "",
-                email=user_elem.find("CorreoElectronico").text or "",
-                phone_number=user_elem.find("NumeroTelefono").text or "",
-                address=user_elem.find("Direccion").text or "",
-                profile_url=user_elem.find("Perfil").text or "",
-            )
-
-            if (
-                validate_user_id(user.user_id)
-                and user.pwd
-                and validate_email(user.email)
-                and validate_phone(user.phone_number)
-            ):
-                users.append(user)
-
-        return users
+        for user_elem in iter_records(source, "usuario"):
+            user, error = _validate_user(user_elem)
+            yield user_elem.get("id"), user, error
 
     except ET.ParseError:
         raise ValueError("Invalid XML format")
@@ -0,0 +1,121 @@
+def _escape(data):
+    """Escapes text and attribute values the way minidom writes them."""
+    if "&" in data or "<" in data or '"' in data or ">" in data:
+        return (
+            data.replace("&", "&amp;")
+            .replace("<", "&lt;")
+            .replace('"', "&quot;")
+            .replace(">", "&gt;")
+        )
+    return data  # Most values need no escaping
+
+
+class XmlWriter:
+    """
+    Writes indented XML as it is produced, without building a document first.
+
+    The output is what minidom's toprettyxml(indent="\\t") writes for the same
+    elements: one element per line, text-only elements on a single line and
+    empty elements as <tag/>. Lines are separated by newlines, with no newline
+    after the last one unless newline() is called, so a document stays byte-
+    compatible with files written by minidom.
+
+    Attributes:
+        write (callable): Receives each piece of output, e.g. a file's write
+            method or a list's append method.
+        indent (str): Indentation added per nesting level.
+    """
+
+    def __init__(self, write, indent="\t"):
+        """
+        Initializes the writer.
+
+        Args:
+            write (callable): Receives each piece of output, as a string.
+            indent (str): Indentation added per nesting level.
+        """
+        self.write = write
+        self.indent = indent
+        self.open_tags = []
+        self.pending = False  # The last start tag still lacks its ">"
+        self.started = False  # Nothing written yet, so no line to break
+
+    def _line(self, content):
+        # One write per line: close the pending start tag and break the line
+        prefix = ">\n" if self.pending else "\n" if self.started else ""
+        self.pending = False
+        self.started = True
+        self.write(prefix + self.indent * len(self.open_tags) + content)
+
+    def _start_tag(self, tag, attributes):
+        if not attributes:
+            return f"<{tag}"
+        return f"<{tag}" + "".join(
+            [f' {name}="{_escape(value)}"' for name, value in attributes.items()]
+        )
+
+    def declaration(self):
+        """Writes the XML declaration."""
+        self._line('<?xml version="1.0" ?>')
+
+    def start(self, tag, attributes=None):
+        """
+        Opens an element; its children follow until the matching end().
+
+        Args:
+            tag (str): Tag of the element.
+            attributes (dict, optional): Attribute name -> value, in order.
+        """
+        self._line(self._start_tag(tag, attributes))
+        self.open_tags.append(tag)
+        self.pending = True
+
+    def end(self):
+        """Closes the innermost open element."""
+        tag = self.open_tags.pop()
+        if self.pending:  # No children
+            self.write("/>")
+            self.pending = False
+        else:
+            self._line(f"</{tag}>")
+
+    def text_element(self, tag, text, attributes=None):
+        """
+        Writes an element that contains only text.
+
+        Args:
+            tag (str): Tag of the element.
+            text (str): Text of the element; empty or None writes <tag/>.
+            attributes (dict, optional): Attribute name -> value, in order.
+        """
+        start_tag = self._start_tag(tag, attributes)
+        if text:
+            self._line(f"{start_tag}>{_escape(text)}</{tag}>")
+        else:
+            self._line(f"{start_tag}/>")
+
+    def element(self, elem):
+        """
+        Writes an ElementTree element and its descendants.
+
+        Whitespace between child elements, such as the indentation of a
+        parsed file, is not kept; elements with children are expected to hold
+        no other text.
+
+        Args:
+            elem (Element): The element to write.
+        """
+        if len(elem):
+            self.start(elem.tag, elem.attrib)
+            for child in elem:
+                self.element(child)
+            self.end()
+        else:
+            self.text_element(elem.tag, elem.text, elem.attrib)
+
+    def newline(self):
+        """Ends the last line, as toprettyxml does at the end of a document."""
+        if self.pending:
+            self.write(">")
+            self.pending = False
+        self.write("\n")
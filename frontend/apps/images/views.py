@@ -1,3 +1,4 @@
+import time
 import requests
 from django.shortcuts import render, redirect
 from django.contrib import messages
@@ -6,6 +7,30 @@ from django.conf import settings
 
 GLOBAL_CONTEXT = {"file_content": None, "image_preview": None}
 ENDPOINT = settings.BACKEND_ENDPOINT
+RENDER_POLL_INTERVAL = 0.5  # seconds between render status checks
+RENDER_POLL_TIMEOUT = 120  # seconds before giving up on a render
+GALLERY_PAGE_SIZE = 12  # images fetched per gallery page
+
+
+def wait_for_render(job_id):
+    """
+    Polls the backend until a background render job finishes.
+
+    Returns:
+        str: The base64 graph of the rendered image.
+    """
+    deadline = time.monotonic() + RENDER_POLL_TIMEOUT
+    while time.monotonic() < deadline:
+        response = requests.get(f"{ENDPOINT}image/render-status/{job_id}")
+        data = response.json()
+        if response.status_code != 200:
+            raise Exception(data.get("message", "Render job not found."))
+        if data["state"] == "done":
+            return data["graph"]
+        if data["state"] == "failed":
+            raise Exception(data.get("message") or "Render failed.")
+        time.sleep(RENDER_POLL_INTERVAL)
+    raise Exception("Timed out waiting for the image render.")
 
 
 def gallery(request):
@@ -14,16 +39,21 @@ def gallery(request):
         messages.error(request, "Please log in to access this page.")
         return redirect("/login")
 
-    context = {"user": user, "images": []}
+    after = request.GET.get("after")
+    context = {"user": user, "images": [], "after": after, "next_after": None}
 
     try:
         flask_url = f"{ENDPOINT}image/gallery"
-        response = requests.get(flask_url)
+        params = {"limit": GALLERY_PAGE_SIZE}
+        if after:
+            params["after"] = after
+        response = requests.get(flask_url, params=params)
 
         if response.status_code == 200:
             data = response.json()
             if data.get("success"):
                 context["images"] = data.get("gallery", [])
+                context["next_after"] = data.get("next_after")
             else:
                 messages.error(
                     request, data.get("message", "Unknown error retrieving gallery.")
@@ -76,9 +106,9 @@ def upload(request):
                         headers=headers,
                     )
 
-                    if response.status_code == 201:
+                    if response.status_code == 202:
                         data = response.json()
-                        graph_base64 = data.get("graph")
+                        graph_base64 = wait_for_render(data["job_id"])
                         context["image"] = graph_base64
 
                         messages.success(
@@ -130,10 +160,11 @@ def image_editor(request):
             flask_url = f"{ENDPOINT}image/transform-image/{image_id}/{filter_type}"
             response = requests.post(flask_url)
 
-            if response.status_code == 200:
+            if response.status_code == 202:
                 data = response.json()
+                transformed_graph = wait_for_render(data["job_id"])
                 context["processed_image"] = (
-                    f"data:image/svg+xml;base64,{data['transformed_graph']}"
+                    f"data:image/svg+xml;base64,{transformed_graph}"
                 )
                 context["original_image"] = (
                     f"data:image/svg+xml;base64,{data.get('original_graph', '')}"
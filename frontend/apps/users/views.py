@@ -1,5 +1,9 @@
+import codecs
 import requests
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+from django.utils.html import escape
 from django.contrib import messages
 from django.conf import settings
 import plotly.graph_objs as go
@@ -90,6 +94,7 @@ def bulk_upload(request):
             return render(request, "users/bulk_upload.html", context)
 
         errors = []
+        summaries = []
         for file in uploaded_files:
             try:
                 file_content = file.read()
@@ -119,6 +124,7 @@ def bulk_upload(request):
                         }
                     )
                     context["file_uploaded"] = True
+                    summaries.append(f"{file.name}: {response.json()['message']}.")
                 else:
                     errors.append(f"Error processing {file.name}: {response.text}")
 
@@ -130,7 +136,7 @@ def bulk_upload(request):
         if errors:
             messages.error(request, " ".join(errors))
         else:
-            messages.success(request, "Files uploaded successfully.")
+            messages.success(request, " ".join(summaries))
 
     if request.GET.get("show_content"):
         context["file_content"] = GLOBAL_CONTEXT["file_content"]
@@ -157,17 +163,39 @@ def view_users(request):
     return render(request, "users/view_users.html", {"users": users})
 
 
+XML_PLACEHOLDER = "__xml_content__"
+
+
+def _stream_xml(response, head, tail):
+    """
+    Yields the XML viewer page with the exported XML passed through as it arrives.
+    """
+    # Un carácter puede quedar partido entre dos fragmentos
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")()
+    yield head
+    try:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            yield escape(decoder.decode(chunk))
+        yield escape(decoder.decode(b"", final=True))
+    finally:
+        response.close()
+    yield tail
+
+
 def view_xml(request):
     flask_export_url = f"{ENDPOINT}admin/export/xml"
-    context = {"xml_content": None}
 
     try:
-        # Solicitud GET al endpoint para obtener el contenido XML
-        response = requests.get(flask_export_url)
+        # Solicitud GET al endpoint; el XML llega por partes, un usuario a la vez
+        response = requests.get(flask_export_url, stream=True)
 
         if response.status_code == 200:
-            # Asignar el contenido XML al contexto
-            context["xml_content"] = response.text
+            # La página se envía alrededor del XML, que se reenvía a medida que llega
+            page = render_to_string(
+                "users/view_xml.html", {"xml_content": XML_PLACEHOLDER}, request
+            )
+            head, tail = page.split(XML_PLACEHOLDER, 1)
+            return StreamingHttpResponse(_stream_xml(response, head, tail))
         else:
             # Manejar errores del servidor Flask
             messages.error(request, f"Error: {response.status_code} - {response.text}")
@@ -175,7 +203,7 @@ def view_xml(request):
         # Manejar errores de conexión
         messages.error(request, f"Error connecting to the server: {str(e)}")
 
-    return render(request, "users/view_xml.html", context)
+    return render(request, "users/view_xml.html", {"xml_content": None})
 
 
 def statistics(request):